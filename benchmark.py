@@ -0,0 +1,31 @@
+import argparse
+
+from src.benchmark import SCALING_GRIDS, run_benchmarks, compare_reports
+
+def main():
+    """
+    Command-line entry point for the benchmark suite.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the pairs trading pipeline on synthetic data.")
+    parser.add_argument('--grid', choices=sorted(SCALING_GRIDS), default='quick',
+                        help="Scaling grid of ticker counts and history lengths.")
+    parser.add_argument('--output', default='benchmark_results.json',
+                        help="Path of the JSON report to write.")
+    parser.add_argument('--repeat', type=int, default=1, help="Timed runs per stage.")
+    parser.add_argument('--max-reference-pairs', type=int, default=2000,
+                        help="Largest pair count on which the per-pair screen is also timed.")
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help="Compare the new report against a baseline report.")
+    args = parser.parse_args()
+
+    run_benchmarks(grid=args.grid, output_path=args.output, repeat=args.repeat,
+                   max_reference_pairs=args.max_reference_pairs)
+
+    if args.compare:
+        comparison = compare_reports(args.compare, args.output)
+        print("\n--- Comparison against baseline ---")
+        print(comparison.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
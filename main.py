@@ -1,39 +1,110 @@
-import pandas as pd
+import argparse
 import os
 
 from src import config
-from src.data_fetcher import fetch_data
-from src.pair_finder import find_cointegrated_pairs
+from src.data_fetcher import update_data
+from src.price_store import store_exists, read_store_meta, load_prices, import_csv
+from src.pair_finder import find_cointegrated_pairs_batched
+from src.candidate_filter import candidate_pairs
 from src.pair_analyzer import analyze_and_plot_pair
-from src.backtester import run_backtest
+from src.portfolio import run_portfolio_backtest, get_pair_frame
 from src.performance import calculate_performance_metrics, plot_performance
+from src.batch_report import render_batch_report
+from src.result_cache import ResultCache, cached_run_portfolio_backtest
+from src.instrumentation import Instrumentation
 
-def run_analysis():
+def run_analysis(instrumentation=None, report_dir=None):
     """
     Main function to execute the pairs trading analysis pipeline.
+
+    Args:
+        instrumentation (Instrumentation, optional): Collects per-stage timings.
+            Defaults to one configured from src/config.py.
+        report_dir (str, optional): Render charts for every cointegrated pair
+            to this directory instead of showing plots. Defaults to config.REPORT_DIR.
+    """
+    if instrumentation is None:
+        instrumentation = Instrumentation(
+            enabled=config.ENABLE_INSTRUMENTATION,
+            trace_memory=config.INSTRUMENTATION_TRACE_MEMORY,
+            profile_stages=config.PROFILE_STAGES,
+            profile_dir=config.PROFILE_DIR
+        )
+
+    try:
+        _run_pipeline(instrumentation, report_dir if report_dir is not None else config.REPORT_DIR)
+    finally:
+        instrumentation.print_summary()
+        instrumentation.write_report(config.INSTRUMENTATION_REPORT_PATH)
+
+def _run_pipeline(instrumentation, report_dir):
+    """
+    Runs the pipeline stages, each measured by `instrumentation`. With a
+    `report_dir` no plot windows are opened.
     """
     print("--- Starting Statistical Arbitrage Analysis ---")
 
-    if not os.path.exists(config.DATA_FILE_PATH):
-        print(f"Data file not found at '{config.DATA_FILE_PATH}'.")
-        stock_data = fetch_data(
+    with instrumentation.stage('update_data'):
+        if not store_exists(config.PRICE_STORE_PATH) and os.path.exists(config.DATA_FILE_PATH):
+            import_csv(config.DATA_FILE_PATH, config.PRICE_STORE_PATH, dtype=config.PRICE_STORE_DTYPE,
+                       start_date=config.START_DATE, end_date=config.END_DATE)
+
+        update_data(
             tickers=config.TICKERS,
             start_date=config.START_DATE,
             end_date=config.END_DATE,
-            file_path=config.DATA_FILE_PATH
+            store_path=config.PRICE_STORE_PATH,
+            dtype=config.PRICE_STORE_DTYPE
         )
-    else:
-        print(f"Loading existing data from '{config.DATA_FILE_PATH}'.")
-        stock_data = pd.read_csv(config.DATA_FILE_PATH, index_col='Date', parse_dates=True)
+
+    with instrumentation.stage('load_data') as stage:
+        stock_data = None
+        if store_exists(config.PRICE_STORE_PATH):
+            print(f"Loading data from '{config.PRICE_STORE_PATH}'.")
+            stored_tickers = read_store_meta(config.PRICE_STORE_PATH)['tickers']
+            stock_data = load_prices(
+                config.PRICE_STORE_PATH,
+                tickers=[ticker for ticker in stored_tickers if ticker in config.TICKERS],
+                start_date=config.START_DATE,
+                end_date=config.END_DATE,
+                min_coverage=config.MIN_TICKER_COVERAGE,
+                dropna='any'
+            )
+            stage['items'] = stock_data.size
 
     if stock_data is None or stock_data.empty:
         print("Failed to load data. Exiting.")
         return
 
-    cointegrated_pairs = find_cointegrated_pairs(
-        data=stock_data,
-        p_value_threshold=config.P_VALUE_THRESHOLD
-    )
+    result_cache = None
+    if config.USE_RESULT_CACHE:
+        result_cache = ResultCache(config.RESULT_CACHE_PATH, max_bytes=config.RESULT_CACHE_MAX_BYTES)
+
+    n_stocks = stock_data.shape[1]
+    pairs_to_test = None
+    if config.CANDIDATE_FILTER is not None:
+        with instrumentation.stage('candidate_pairs', items=n_stocks * (n_stocks - 1) // 2):
+            pairs_to_test = candidate_pairs(
+                stock_data,
+                method=config.CANDIDATE_FILTER,
+                k=config.CANDIDATE_TOP_K,
+                min_correlation=config.CANDIDATE_MIN_CORRELATION,
+                groups=config.SECTOR_GROUPS
+            )
+
+    n_candidates = n_stocks * (n_stocks - 1) // 2 if pairs_to_test is None else len(pairs_to_test)
+    with instrumentation.stage('find_cointegrated_pairs', items=n_candidates):
+        cointegrated_pairs = find_cointegrated_pairs_batched(
+            data=stock_data,
+            p_value_threshold=config.P_VALUE_THRESHOLD,
+            maxlag=config.ADF_MAXLAG,
+            autolag=config.ADF_AUTOLAG,
+            block_size=config.SCREEN_BLOCK_SIZE,
+            workers=config.SCREEN_WORKERS,
+            cache=result_cache,
+            instrumentation=instrumentation,
+            pairs=pairs_to_test
+        )
 
     if not cointegrated_pairs:
         print("\n--- Analysis Complete ---")
@@ -42,19 +113,65 @@ def run_analysis():
         print(f"\n--- Analysis Complete: Found {len(cointegrated_pairs)} Cointegrated Pair(s) ---")
         
         best_pair_info = cointegrated_pairs[0]
-        analyze_and_plot_pair(data=stock_data, pair=(best_pair_info[0], best_pair_info[1]))
+        if report_dir is None:
+            with instrumentation.stage('analyze_and_plot_pair', items=len(stock_data)):
+                analyze_and_plot_pair(data=stock_data, pair=(best_pair_info[0], best_pair_info[1]))
 
-        portfolio_df = run_backtest(data=stock_data, pair_info=best_pair_info)
+        with instrumentation.stage('run_portfolio_backtest', items=len(cointegrated_pairs)):
+            backtest_kwargs = dict(
+                weights=config.PORTFOLIO_WEIGHTS,
+                capital=config.PORTFOLIO_CAPITAL,
+                rebalance=config.PORTFOLIO_REBALANCE
+            )
+            if result_cache is not None:
+                backtest_results = cached_run_portfolio_backtest(stock_data, cointegrated_pairs, result_cache,
+                                                                 run_portfolio_backtest, **backtest_kwargs)
+            else:
+                backtest_results = run_portfolio_backtest(data=stock_data, pairs=cointegrated_pairs,
+                                                          **backtest_kwargs)
+            portfolio_df = get_pair_frame(backtest_results, best_pair_info)
         
-        metrics = calculate_performance_metrics(portfolio_df)
+        with instrumentation.stage('calculate_performance_metrics', items=2):
+            metrics = calculate_performance_metrics(portfolio_df)
+            portfolio_metrics = calculate_performance_metrics(backtest_results['portfolio'])
+
         print("\n--- Backtest Performance Metrics ---")
         for metric, value in metrics.items():
             print(f"  {metric}: {value}")
+
+        print(f"\n--- Portfolio Performance Metrics ({len(cointegrated_pairs)} Pair(s)) ---")
+        for metric, value in portfolio_metrics.items():
+            print(f"  {metric}: {value}")
         
-        plot_performance(portfolio_df, best_pair_info)
+        if report_dir is None:
+            with instrumentation.stage('plot_performance', items=len(portfolio_df)):
+                plot_performance(portfolio_df, best_pair_info)
+        else:
+            with instrumentation.stage('render_batch_report', items=len(cointegrated_pairs)):
+                render_batch_report(
+                    data=stock_data,
+                    pairs=cointegrated_pairs,
+                    output_dir=report_dir,
+                    formats=config.REPORT_FORMATS,
+                    workers=config.REPORT_WORKERS
+                )
 
     print("\n--- End of Program ---")
 
 
 if __name__ == "__main__":
-    run_analysis()
+    parser = argparse.ArgumentParser(description="Run the statistical arbitrage analysis pipeline.")
+    parser.add_argument('--profile', action='store_true',
+                        help="Record per-stage timings and write a JSON report.")
+    parser.add_argument('--profile-stage', action='append', default=[], metavar='STAGE',
+                        help="Run the named stage under cProfile (implies --profile). Repeatable.")
+    parser.add_argument('--report-dir', default=None,
+                        help="Write charts and metrics for every pair to this directory instead of showing plots.")
+    args = parser.parse_args()
+
+    run_analysis(Instrumentation(
+        enabled=config.ENABLE_INSTRUMENTATION or args.profile or bool(args.profile_stage),
+        trace_memory=config.INSTRUMENTATION_TRACE_MEMORY,
+        profile_stages=list(config.PROFILE_STAGES) + args.profile_stage,
+        profile_dir=config.PROFILE_DIR
+    ), report_dir=args.report_dir)
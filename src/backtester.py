@@ -2,13 +2,107 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
-def run_backtest(data, pair_info):
+def compute_positions(z_scores, entry_threshold, exit_threshold, stop_loss_threshold, entry_mask=None):
+    """
+    Runs the entry/exit/stop-loss state machine over an array of z-scores.
+    The position for bar i is decided from the z-score of bar i-1, so the
+    strategy only ever trades on information that was already known.
+
+    Args:
+        z_scores (np.ndarray): 1-D array of spread z-scores (NaN while warming up).
+        entry_threshold (float): |z| above which a new position is opened.
+        exit_threshold (float): |z| below which an open position is closed.
+        stop_loss_threshold (float): |z| above which an open position is stopped out.
+        entry_mask (np.ndarray, optional): Boolean array; new positions are only
+            opened on bar i if entry_mask[i-1] is True. Exits are unaffected.
+
+    Returns:
+        np.ndarray: Integer positions per bar: 1 long spread, -1 short spread, 0 flat.
+    """
+    z_values = np.asarray(z_scores, dtype=np.float64).tolist()
+    allowed = [True] * len(z_values) if entry_mask is None else np.asarray(entry_mask, dtype=bool).tolist()
+    positions = [0] * len(z_values)
+    current_pos = 0
+
+    for i in range(1, len(z_values)):
+        z_score = z_values[i-1]
+
+        if current_pos == 0:
+            if allowed[i-1] and z_score > entry_threshold:
+                current_pos = -1
+            elif allowed[i-1] and z_score < -entry_threshold:
+                current_pos = 1
+        elif current_pos == -1:
+            if z_score < exit_threshold or z_score > stop_loss_threshold:
+                current_pos = 0
+        elif z_score > -exit_threshold or z_score < -stop_loss_threshold:
+            current_pos = 0
+
+        positions[i] = current_pos
+
+    return np.array(positions, dtype=np.int64)
+
+def compute_positions_matrix(z_scores, entry_threshold, exit_threshold, stop_loss_threshold):
+    """
+    Runs the same state machine as compute_positions for many pairs at once.
+    Each bar is one vectorized step over all pairs.
+
+    Args:
+        z_scores (np.ndarray): 2-D array of z-scores with shape (n_bars, n_pairs).
+        entry_threshold (float or np.ndarray): |z| above which a new position is opened,
+            either shared or one value per column.
+        exit_threshold (float or np.ndarray): |z| below which an open position is closed.
+        stop_loss_threshold (float or np.ndarray): |z| above which an open position is stopped out.
+
+    Returns:
+        np.ndarray: Integer positions with the same shape as `z_scores`.
+    """
+    z_scores = np.asarray(z_scores, dtype=np.float64)
+    positions = np.zeros(z_scores.shape, dtype=np.int64)
+
+    for i in range(1, len(z_scores)):
+        positions[i] = step_positions(positions[i-1], z_scores[i-1], entry_threshold,
+                                      exit_threshold, stop_loss_threshold)
+
+    return positions
+
+def step_positions(current_pos, z_score, entry_threshold, exit_threshold, stop_loss_threshold):
+    """
+    Advances the position state machine by one bar for an array of pairs.
+
+    Args:
+        current_pos (np.ndarray): Current positions (1, -1 or 0) per pair.
+        z_score (np.ndarray): Latest z-score per pair.
+        entry_threshold (float or np.ndarray): |z| above which a new position is opened.
+        exit_threshold (float or np.ndarray): |z| below which an open position is closed.
+        stop_loss_threshold (float or np.ndarray): |z| above which an open position is stopped out.
+
+    Returns:
+        np.ndarray: The positions to hold over the next bar.
+    """
+    flat = current_pos == 0
+    entries = np.where(z_score > entry_threshold, -1, np.where(z_score < -entry_threshold, 1, 0))
+    short_exit = (current_pos == -1) & ((z_score < exit_threshold) | (z_score > stop_loss_threshold))
+    long_exit = (current_pos == 1) & ((z_score > -exit_threshold) | (z_score < -stop_loss_threshold))
+
+    return np.where(flat, entries, np.where(short_exit | long_exit, 0, current_pos))
+
+def run_backtest(data, pair_info, window=30, entry_threshold=2.0, exit_threshold=0.5,
+                 stop_loss_threshold=3.0, entry_mask=None):
     """
     Runs a backtest for a given cointegrated pair.
 
     Args:
         data (pd.DataFrame): DataFrame with historical price data.
         pair_info (tuple): Tuple containing pair tickers, p-value, and hedge ratio.
+            The hedge ratio may also be a series aligned with `data`, e.g. from
+            walk_forward.recursive_hedge_ratios.
+        window (int): Rolling window for the spread mean and standard deviation.
+        entry_threshold (float): |z| above which a new position is opened.
+        exit_threshold (float): |z| below which an open position is closed.
+        stop_loss_threshold (float): |z| above which an open position is stopped out.
+        entry_mask (array-like, optional): Boolean per bar; new positions are only
+            opened after bars where it is True.
 
     Returns:
         pd.DataFrame: A DataFrame containing the portfolio performance over time.
@@ -20,40 +114,28 @@ def run_backtest(data, pair_info):
     df = pd.DataFrame(index=data.index)
     df['s1_price'] = data[stock1_ticker]
     df['s2_price'] = data[stock2_ticker]
+
+    # A time-varying hedge ratio is applied bar by bar; each bar's return uses
+    # the ratio from the bar on which its position was decided.
+    if np.ndim(hedge_ratio) > 0:
+        if isinstance(hedge_ratio, pd.Series):
+            hedge_ratio = hedge_ratio.reindex(df.index)
+        else:
+            hedge_ratio = pd.Series(hedge_ratio, index=df.index)
+        returns_hedge_ratio = hedge_ratio.shift(1)
+    else:
+        returns_hedge_ratio = hedge_ratio
     
     df['spread'] = df['s2_price'] - hedge_ratio * df['s1_price']
     
-    window = 30
     df['moving_avg'] = df['spread'].rolling(window=window).mean()
     df['moving_std'] = df['spread'].rolling(window=window).std()
     df['z_score'] = (df['spread'] - df['moving_avg']) / df['moving_std']
 
-    entry_threshold = 2.0
-    exit_threshold = 0.5
-    stop_loss_threshold = 3.0
-
-    df['position'] = 0
-    in_position = False
-
-    for i in range(1, len(df)):
-        if not in_position and df['z_score'].iloc[i-1] > entry_threshold:
-            df.loc[df.index[i], 'position'] = -1
-            in_position = True
-        elif not in_position and df['z_score'].iloc[i-1] < -entry_threshold:
-            df.loc[df.index[i], 'position'] = 1
-            in_position = True
-        elif in_position:
-            current_pos = df['position'].iloc[i-1]
-            z_score = df['z_score'].iloc[i-1]
-            
-            if current_pos == -1 and (z_score < exit_threshold or z_score > stop_loss_threshold):
-                in_position = False
-            elif current_pos == 1 and (z_score > -exit_threshold or z_score < -stop_loss_threshold):
-                in_position = False
-            else:
-                df.loc[df.index[i], 'position'] = current_pos
-                
-    df['strategy_returns'] = (df['position'].shift(1) * (hedge_ratio * df['s1_price'].pct_change() - df['s2_price'].pct_change())).fillna(0)
+    df['position'] = compute_positions(df['z_score'].to_numpy(), entry_threshold,
+                                       exit_threshold, stop_loss_threshold, entry_mask)
+
+    df['strategy_returns'] = (df['position'].shift(1) * (returns_hedge_ratio * df['s1_price'].pct_change() - df['s2_price'].pct_change())).fillna(0)
     
     df['cumulative_returns'] = (1 + df['strategy_returns']).cumprod()
 
@@ -0,0 +1,155 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from statsmodels.tsa.adfvalues import mackinnonp
+
+def default_maxlag(nobs):
+    """
+    Returns the default maximum ADF lag used by statsmodels' adfuller
+    (Schwert's rule, capped for short samples).
+
+    Args:
+        nobs (int): Number of observations in the series being tested.
+
+    Returns:
+        int: The maximum number of lagged differences to consider.
+    """
+    maxlag = int(np.ceil(12.0 * np.power(nobs / 100.0, 1 / 4.0)))
+    maxlag = min(nobs // 2 - 2, maxlag)
+    if maxlag < 0:
+        raise ValueError("Sample size is too short for the ADF regression.")
+    return maxlag
+
+def _lagged_design(x, xdiff, lag):
+    """
+    Builds the stacked ADF regression for every column of `x` at a fixed lag.
+
+    Returns:
+        tuple: (y, X) with y of shape (n_series, nobs) and X of shape
+               (n_series, nobs, lag + 2) ordered as [const, lag_1..lag_k, level].
+    """
+    n_rows = x.shape[0] - 1 - lag
+    n_series = x.shape[1]
+
+    X = np.empty((n_series, n_rows, lag + 2))
+    X[:, :, 0] = 1.0
+    if lag > 0:
+        windows = sliding_window_view(xdiff, lag + 1, axis=0)
+        X[:, :, 1:lag + 1] = windows[:, :, lag - 1::-1].transpose(1, 0, 2)
+    X[:, :, -1] = x[lag:-1].T
+
+    y = xdiff[lag:].T
+    return y, X
+
+def _least_squares(y, X):
+    """
+    Solves a stack of least-squares problems with one batched QR factorization.
+
+    Returns:
+        tuple: (qty, R, resid_ssr) where qty = Q'y, R is the triangular factor
+               and resid_ssr is the residual sum of squares of the full model.
+    """
+    Q, R = np.linalg.qr(X)
+    qty = np.einsum('bnk,bn->bk', Q, y)
+    resid = y - np.einsum('bnk,bk->bn', Q, qty)
+    resid_ssr = np.einsum('bn,bn->b', resid, resid)
+    return qty, R, resid_ssr
+
+def _select_lags(x, xdiff, maxlag, autolag):
+    """
+    Picks the ADF lag for every series by information criterion, using the
+    common sample of the largest model exactly as adfuller does.
+    """
+    y, X = _lagged_design(x, xdiff, maxlag)
+    # adfuller orders the autolag regressors as [const, level, lag_1..lag_k]
+    # and fits nested prefixes of that matrix, so move the level column up.
+    X = np.concatenate([X[:, :, :1], X[:, :, -1:], X[:, :, 1:-1]], axis=2)
+    qty, _, resid_ssr = _least_squares(y, X)
+
+    # SSR of the model using the first m columns is the full-model residual
+    # plus the squared Q'y components of the columns that were left out.
+    tail = np.cumsum((qty ** 2)[:, ::-1], axis=1)[:, ::-1]
+    tail = np.concatenate([tail, np.zeros((tail.shape[0], 1))], axis=1)
+    n_cols = np.arange(2, maxlag + 3)
+    ssr = resid_ssr[:, None] + tail[:, n_cols]
+
+    nobs = y.shape[1]
+    llf = -nobs / 2.0 * (np.log(2 * np.pi) + np.log(ssr / nobs) + 1)
+    if autolag == 'AIC':
+        ic = -2 * llf + 2 * n_cols
+    else:
+        ic = -2 * llf + np.log(nobs) * n_cols
+
+    return np.argmin(ic, axis=1)
+
+def batch_adfuller(spreads, maxlag=None, autolag='AIC', max_cells=2 ** 25):
+    """
+    Runs the Augmented Dickey-Fuller test (constant, no trend) on many series
+    at once. Mirrors statsmodels' adfuller: with autolag the lag length is
+    chosen on a common sample and the regression is then refit on the
+    longest sample available for that lag.
+
+    Args:
+        spreads (np.ndarray): 2-D array of shape (n_obs, n_series).
+        maxlag (int, optional): Maximum lag. Defaults to adfuller's rule.
+        autolag (str, optional): 'AIC', 'BIC', or None to always use maxlag.
+        max_cells (int): Upper bound on the size of one stacked design matrix;
+            larger batches are split so long histories do not exhaust memory.
+
+    Returns:
+        tuple: Arrays (adf_stats, p_values, used_lags), one entry per series.
+               Constant series get NaN statistics and p-values.
+    """
+    x = np.asarray(spreads, dtype=np.float64)
+    if x.ndim == 1:
+        x = x[:, None]
+    if autolag not in ('AIC', 'BIC', None):
+        raise ValueError("autolag must be 'AIC', 'BIC' or None.")
+
+    n_obs, n_series = x.shape
+    if maxlag is None:
+        maxlag = default_maxlag(n_obs)
+    elif maxlag > n_obs // 2 - 2:
+        raise ValueError("maxlag must be less than (nobs/2 - 2).")
+
+    # The stacked design holds n_series x nobs x (maxlag + 2) values.
+    series_per_solve = max(1, max_cells // (n_obs * (maxlag + 2)))
+    if n_series > series_per_solve:
+        parts = [
+            batch_adfuller(x[:, start:start + series_per_solve], maxlag=maxlag, autolag=autolag,
+                           max_cells=max_cells)
+            for start in range(0, n_series, series_per_solve)
+        ]
+        return tuple(np.concatenate(arrays) for arrays in zip(*parts))
+
+    adf_stats = np.full(n_series, np.nan)
+    used_lags = np.full(n_series, maxlag)
+
+    valid = np.ptp(x, axis=0) > 0
+    x = x[:, valid]
+    xdiff = np.diff(x, axis=0)
+
+    lags = np.full(x.shape[1], maxlag)
+    if autolag is not None and x.shape[1] > 0:
+        lags = _select_lags(x, xdiff, maxlag, autolag)
+
+    stats = np.empty(x.shape[1])
+    for lag in np.unique(lags):
+        members = np.flatnonzero(lags == lag)
+        y, X = _lagged_design(x[:, members], xdiff[:, members], lag)
+        qty, R, resid_ssr = _least_squares(y, X)
+
+        # With the level in the last column its coefficient is qty/R and its
+        # standard error is sigma/|R|, so the t-value needs no inverse.
+        dof = y.shape[1] - X.shape[2]
+        sigma = np.sqrt(resid_ssr / dof)
+        stats[members] = np.sign(R[:, -1, -1]) * qty[:, -1] / sigma
+
+    adf_stats[valid] = stats
+    used_lags[valid] = lags
+
+    p_values = np.array([
+        mackinnonp(stat, regression='c', N=1) if np.isfinite(stat) else np.nan
+        for stat in adf_stats
+    ])
+
+    return adf_stats, p_values, used_lags
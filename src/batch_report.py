@@ -0,0 +1,122 @@
+import pandas as pd
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from src.backtester import run_backtest
+from src.pair_analyzer import draw_pair_analysis
+from src.performance import calculate_numeric_performance_metrics, draw_performance
+
+def _chart_name(pair_info, kind):
+    """
+    Returns a file-system safe base name for one chart of a pair.
+    """
+    label = f"{pair_info[0]}_{pair_info[1]}"
+    return "".join(c if c.isalnum() or c in '-_.' else '-' for c in label) + f"_{kind}"
+
+def _save_figure(draw, figsize, output_dir, name, formats, dpi):
+    """
+    Draws a two-panel figure on an Agg canvas, outside pyplot, and saves it
+    in every requested format.
+
+    Returns:
+        list: Paths of the written files.
+    """
+    with plt.style.context('seaborn-v0_8-darkgrid'):
+        fig = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(fig)
+        axes = fig.subplots(2, 1, sharex=True, gridspec_kw={'height_ratios': [2, 1]})
+        draw(fig, axes)
+        fig.tight_layout(rect=[0, 0, 1, 0.96])
+
+        paths = []
+        for fmt in formats:
+            path = os.path.join(output_dir, f"{name}.{fmt}")
+            fig.savefig(path, format=fmt)
+            paths.append(path)
+    return paths
+
+def render_pair_report(task):
+    """
+    Backtests one pair and renders its pair-analysis and performance charts.
+    Runs in a worker process when the report is rendered in parallel.
+
+    Args:
+        task (tuple): (pair_data, pair_info, output_dir, formats, dpi, max_points,
+            backtest_kwargs), where pair_data holds the pair's two price columns.
+
+    Returns:
+        dict: The pair, its numeric performance metrics and the chart paths.
+    """
+    pair_data, pair_info, output_dir, formats, dpi, max_points, backtest_kwargs = task
+    stock1_ticker, stock2_ticker, p_value, hedge_ratio = pair_info
+
+    portfolio_df = run_backtest(pair_data, pair_info, **backtest_kwargs)
+    metrics = calculate_numeric_performance_metrics(portfolio_df)
+
+    analysis_paths = _save_figure(
+        lambda fig, axes: draw_pair_analysis(fig, axes, pair_data, (stock1_ticker, stock2_ticker),
+                                             max_points=max_points),
+        (15, 10), output_dir, _chart_name(pair_info, 'analysis'), formats, dpi)
+    performance_paths = _save_figure(
+        lambda fig, axes: draw_performance(fig, axes, portfolio_df, pair_info, max_points=max_points),
+        (15, 12), output_dir, _chart_name(pair_info, 'performance'), formats, dpi)
+
+    return dict(
+        {'ticker1': stock1_ticker, 'ticker2': stock2_ticker,
+         'p_value': p_value, 'hedge_ratio': hedge_ratio},
+        **metrics,
+        analysis_charts=';'.join(analysis_paths),
+        performance_charts=';'.join(performance_paths),
+    )
+
+def render_batch_report(data, pairs, output_dir, formats=('png',), workers=1, dpi=100,
+                        max_points=None, rank_by='Sharpe Ratio', **backtest_kwargs):
+    """
+    Backtests many pairs and writes their charts to files without opening
+    any window, then ranks the pairs by a numeric metric. Pairs are rendered
+    in a process pool when `workers` is above 1.
+
+    Args:
+        data (pd.DataFrame): DataFrame with stock prices, where columns are tickers.
+        pairs (list): Tuples (ticker1, ticker2, p_value, hedge_ratio), e.g. from
+            find_cointegrated_pairs_batched.
+        output_dir (str): Directory for the charts and metrics.csv.
+        formats (tuple): Image formats to write, e.g. ('png', 'svg').
+        workers (int): Number of worker processes. 1 renders serially in-process.
+        dpi (int): Resolution of raster charts.
+        max_points (int, optional): Min/max buckets per line. Defaults to the
+            chart width in pixels.
+        rank_by (str): Metric the report is sorted by, best first.
+        **backtest_kwargs: Arguments passed on to run_backtest.
+
+    Returns:
+        pd.DataFrame: One row per pair with its metrics and chart paths.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    print(f"Rendering charts for {len(pairs)} pair(s) to '{output_dir}'...")
+
+    tasks = [
+        (data[[pair_info[0], pair_info[1]]], pair_info, output_dir, tuple(formats), dpi,
+         max_points, backtest_kwargs)
+        for pair_info in pairs
+    ]
+
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            rows = list(executor.map(render_pair_report, tasks))
+    else:
+        rows = [render_pair_report(task) for task in tasks]
+
+    report = pd.DataFrame(rows)
+    if not report.empty:
+        report = report.sort_values(rank_by, ascending=False, ignore_index=True)
+
+    report_path = os.path.join(output_dir, 'metrics.csv')
+    report.to_csv(report_path, index=False)
+    print(f"Pair report saved to {report_path}")
+
+    return report
@@ -0,0 +1,188 @@
+import pandas as pd
+import numpy as np
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+import warnings
+from datetime import datetime, timezone
+
+from src.synthetic import generate_cointegrated_universe
+from src.pair_finder import find_cointegrated_pairs, find_cointegrated_pairs_batched
+from src.backtester import run_backtest
+from src.performance import calculate_performance_metrics
+
+SCALING_GRIDS = {
+    'quick': {'n_tickers': [10, 50], 'n_obs': [252, 1008], 'freq': 'B'},
+    'daily': {'n_tickers': [10, 100, 500, 1000], 'n_obs': [1008, 2520], 'freq': 'B'},
+    'minute': {'n_tickers': [10, 100], 'n_obs': [9750, 98280], 'freq': 'min'},
+}
+
+def _git_commit():
+    """
+    Returns the current git commit hash, or None outside a git checkout.
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def measure(function, *args, repeat=1, **kwargs):
+    """
+    Times a call and measures its peak traced memory. Timing runs are made
+    without tracemalloc so its overhead does not distort them; one further
+    run is traced for the memory peak. Printed output and warnings are discarded.
+
+    Args:
+        function (callable): The function to measure.
+        *args: Positional arguments for `function`.
+        repeat (int): Number of timed runs; the fastest is reported.
+        **kwargs: Keyword arguments for `function`.
+
+    Returns:
+        tuple: (result, seconds, peak_bytes).
+    """
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            timings.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        try:
+            function(*args, **kwargs)
+            _, peak_bytes = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return result, min(timings), peak_bytes
+
+def benchmark_case(n_tickers, n_obs, freq='B', n_pairs=None, p_value_threshold=0.05,
+                   max_reference_pairs=2000, repeat=1, seed=0):
+    """
+    Benchmarks the pipeline stages on one synthetic universe.
+
+    Args:
+        n_tickers (int): Number of tickers in the synthetic panel.
+        n_obs (int): Number of bars.
+        freq (str): Bar frequency of the synthetic index.
+        n_pairs (int, optional): Planted cointegrated pairs. Defaults to n_tickers // 10, at least 1.
+        p_value_threshold (float): The significance level for the cointegration test.
+        max_reference_pairs (int): Largest pair count on which the original
+            per-pair find_cointegrated_pairs is also timed.
+        repeat (int): Timed runs per stage.
+        seed (int): Seed for the synthetic panel.
+
+    Returns:
+        list: One result record (dict) per measured stage.
+    """
+    if n_pairs is None:
+        n_pairs = max(1, n_tickers // 10)
+    data, planted_pairs = generate_cointegrated_universe(n_tickers, n_obs, n_pairs=n_pairs,
+                                                         freq=freq, seed=seed)
+    n_candidates = n_tickers * (n_tickers - 1) // 2
+    case = {'n_tickers': n_tickers, 'n_obs': n_obs, 'freq': freq, 'n_planted_pairs': n_pairs}
+    records = []
+
+    found, seconds, peak = measure(find_cointegrated_pairs_batched, data, p_value_threshold, repeat=repeat)
+    records.append(dict(case, stage='find_cointegrated_pairs_batched', items=n_candidates,
+                        seconds=seconds, peak_bytes=peak, n_found=len(found)))
+
+    if n_candidates <= max_reference_pairs:
+        _, seconds, peak = measure(find_cointegrated_pairs, data, p_value_threshold, repeat=repeat)
+        records.append(dict(case, stage='find_cointegrated_pairs', items=n_candidates,
+                            seconds=seconds, peak_bytes=peak))
+
+    t1, t2, hedge_ratio = planted_pairs[0]
+    pair_info = (t1, t2, None, hedge_ratio)
+    portfolio_df, seconds, peak = measure(run_backtest, data, pair_info, repeat=repeat)
+    records.append(dict(case, stage='run_backtest', items=n_obs, seconds=seconds, peak_bytes=peak))
+
+    _, seconds, peak = measure(calculate_performance_metrics, portfolio_df, repeat=repeat)
+    records.append(dict(case, stage='calculate_performance_metrics', items=n_obs,
+                        seconds=seconds, peak_bytes=peak))
+
+    return records
+
+def run_benchmarks(grid='quick', output_path=None, repeat=1, max_reference_pairs=2000, seed=0):
+    """
+    Runs benchmark_case over a scaling grid of ticker counts and history
+    lengths and optionally writes the results as JSON.
+
+    Args:
+        grid (str or dict): A key of SCALING_GRIDS, or a dict with 'n_tickers',
+            'n_obs' and 'freq' entries.
+        output_path (str, optional): Where to write the JSON report.
+        repeat (int): Timed runs per stage.
+        max_reference_pairs (int): Largest pair count on which the per-pair screen is timed.
+        seed (int): Seed for the synthetic panels.
+
+    Returns:
+        dict: The report, with environment metadata and a list of 'results'.
+    """
+    if isinstance(grid, str):
+        grid_name, grid = grid, SCALING_GRIDS[grid]
+    else:
+        grid_name = 'custom'
+
+    results = []
+    for n_tickers in grid['n_tickers']:
+        for n_obs in grid['n_obs']:
+            print(f"Benchmarking {n_tickers} tickers x {n_obs} bars ({grid['freq']})...")
+            for record in benchmark_case(n_tickers, n_obs, freq=grid['freq'], repeat=repeat,
+                                         max_reference_pairs=max_reference_pairs, seed=seed):
+                print(f"  {record['stage']}: {record['seconds']:.4f}s, "
+                      f"peak {record['peak_bytes'] / 1e6:.1f} MB")
+                results.append(record)
+
+    report = {
+        'grid': grid_name,
+        'commit': _git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+    if output_path is not None:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        with open(output_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Benchmark results saved to {output_path}")
+
+    return report
+
+def compare_reports(baseline_path, current_path, threshold=1.2):
+    """
+    Compares two benchmark reports stage by stage and flags slowdowns.
+
+    Args:
+        baseline_path (str): JSON report from the reference commit.
+        current_path (str): JSON report from the commit under test.
+        threshold (float): Time ratio above which a case is flagged as a regression.
+
+    Returns:
+        pd.DataFrame: One row per case present in both reports, with time and
+                      memory ratios (current / baseline) and a 'regression' flag.
+    """
+    keys = ['stage', 'n_tickers', 'n_obs', 'freq']
+    with open(baseline_path) as f:
+        baseline = pd.DataFrame(json.load(f)['results'])
+    with open(current_path) as f:
+        current = pd.DataFrame(json.load(f)['results'])
+
+    merged = baseline[keys + ['seconds', 'peak_bytes']].merge(
+        current[keys + ['seconds', 'peak_bytes']], on=keys, suffixes=('_baseline', '_current'))
+    merged['time_ratio'] = merged['seconds_current'] / merged['seconds_baseline']
+    merged['memory_ratio'] = merged['peak_bytes_current'] / merged['peak_bytes_baseline']
+    merged['regression'] = merged['time_ratio'] > threshold
+    return merged
@@ -0,0 +1,189 @@
+import pandas as pd
+import numpy as np
+from scipy.cluster.hierarchy import fcluster, linkage
+from scipy.spatial.distance import squareform
+
+from src.synthetic import generate_cointegrated_universe
+from src.pair_finder import find_cointegrated_pairs_batched
+
+def return_correlation(data):
+    """
+    Computes the correlation matrix of daily log returns for every ticker
+    in one matrix product.
+
+    Args:
+        data (pd.DataFrame): DataFrame with stock prices, where columns are tickers.
+
+    Returns:
+        np.ndarray: (n_tickers, n_tickers) correlation matrix in column order.
+                    Tickers with constant prices get zero correlation.
+    """
+    returns = np.diff(np.log(data.to_numpy(dtype=np.float64)), axis=0)
+    returns -= returns.mean(axis=0)
+    norms = np.sqrt(np.einsum('ij,ij->j', returns, returns))
+    norms[norms == 0] = np.inf
+    standardized = returns / norms
+    return standardized.T @ standardized
+
+def _pairs_from_mask(columns, mask):
+    """
+    Returns the ticker pairs of the upper triangle of a boolean mask, in the
+    same order and orientation as itertools.combinations(columns, 2).
+    """
+    first, second = np.nonzero(np.triu(mask, k=1))
+    return [(columns[i], columns[j]) for i, j in zip(first, second)]
+
+def top_k_pairs(data, k=10, min_correlation=None, correlation=None):
+    """
+    Keeps, for every ticker, the `k` partners with the highest return
+    correlation. A pair is kept if either ticker selected the other, so at
+    most n_tickers * k pairs remain.
+
+    Args:
+        data (pd.DataFrame): DataFrame with stock prices, where columns are tickers.
+        k (int): Partners kept per ticker.
+        min_correlation (float, optional): Drop pairs below this correlation.
+        correlation (np.ndarray, optional): Precomputed return_correlation(data).
+
+    Returns:
+        list: Candidate pairs of tickers.
+    """
+    if correlation is None:
+        correlation = return_correlation(data)
+    n_tickers = correlation.shape[0]
+    k = min(k, n_tickers - 1)
+    if k < 1:
+        return []
+
+    ranked = correlation.copy()
+    np.fill_diagonal(ranked, -np.inf)
+    partners = np.argpartition(-ranked, k - 1, axis=1)[:, :k]
+
+    mask = np.zeros((n_tickers, n_tickers), dtype=bool)
+    mask[np.repeat(np.arange(n_tickers), k), partners.ravel()] = True
+    mask |= mask.T
+    if min_correlation is not None:
+        mask &= correlation >= min_correlation
+
+    return _pairs_from_mask(list(data.columns), mask)
+
+def correlation_clusters(data, n_clusters, correlation=None):
+    """
+    Groups tickers by average-linkage hierarchical clustering on the
+    correlation distance sqrt(2 * (1 - rho)).
+
+    Args:
+        data (pd.DataFrame): DataFrame with stock prices, where columns are tickers.
+        n_clusters (int): Maximum number of clusters.
+        correlation (np.ndarray, optional): Precomputed return_correlation(data).
+
+    Returns:
+        dict: ticker -> cluster label.
+    """
+    if correlation is None:
+        correlation = return_correlation(data)
+    if correlation.shape[0] < 2:
+        return {ticker: 1 for ticker in data.columns}
+
+    distance = np.sqrt(np.clip(2.0 * (1.0 - correlation), 0.0, None))
+    np.fill_diagonal(distance, 0.0)
+    labels = fcluster(linkage(squareform(distance, checks=False), method='average'),
+                      n_clusters, criterion='maxclust')
+    return dict(zip(data.columns, labels))
+
+def same_group_pairs(data, groups):
+    """
+    Keeps only the pairs whose tickers share a group, e.g. a sector or a
+    correlation cluster. Tickers missing from `groups` are dropped.
+
+    Args:
+        data (pd.DataFrame): DataFrame with stock prices, where columns are tickers.
+        groups (dict): ticker -> group label.
+
+    Returns:
+        list: Candidate pairs of tickers.
+    """
+    labels = pd.Series([groups.get(ticker) for ticker in data.columns], dtype=object)
+    codes = labels.astype('category').cat.codes.to_numpy()
+    mask = (codes[:, None] == codes[None, :]) & (codes[:, None] >= 0)
+    return _pairs_from_mask(list(data.columns), mask)
+
+def candidate_pairs(data, method='top_k', k=10, min_correlation=None, groups=None, n_clusters=None):
+    """
+    Generates the candidate pairs for the cointegration screen and reports
+    how many of all combinations were pruned.
+
+    Args:
+        data (pd.DataFrame): DataFrame with stock prices, where columns are tickers.
+        method (str): 'top_k' for the most correlated partners of each ticker,
+            'cluster' for pairs within the same group.
+        k (int): Partners kept per ticker for 'top_k'.
+        min_correlation (float, optional): Minimum return correlation for 'top_k'.
+        groups (dict, optional): ticker -> group label for 'cluster', e.g. sectors.
+            Defaults to correlation clusters.
+        n_clusters (int, optional): Number of correlation clusters when no
+            `groups` are given. Defaults to about n_tickers / k.
+
+    Returns:
+        list: Candidate pairs of tickers, in combinations order.
+    """
+    n_stocks = data.shape[1]
+    n_total = n_stocks * (n_stocks - 1) // 2
+
+    if method == 'top_k':
+        pairs = top_k_pairs(data, k=k, min_correlation=min_correlation)
+    elif method == 'cluster':
+        if groups is None:
+            if n_clusters is None:
+                n_clusters = max(1, int(np.ceil(n_stocks / max(k, 1))))
+            groups = correlation_clusters(data, n_clusters)
+        pairs = same_group_pairs(data, groups)
+    else:
+        raise ValueError("method must be 'top_k' or 'cluster'.")
+
+    print(f"Candidate filter ({method}): kept {len(pairs)} of {n_total} pairs, "
+          f"pruned {n_total - len(pairs)}.")
+    return pairs
+
+def candidate_recall(n_tickers=200, n_obs=1008, n_pairs=20, p_value_threshold=0.05, seed=0,
+                     screen_function=None, **filter_kwargs):
+    """
+    Measures how many cointegrated pairs survive the pre-filter on a
+    synthetic universe, compared with the exhaustive screen. Among many
+    independent random walks the exhaustive screen also passes spurious
+    pairs, which a correlation filter is expected to drop, so
+    'planted_recall' is the number to watch.
+
+    Args:
+        n_tickers (int): Number of tickers in the synthetic panel.
+        n_obs (int): Number of bars.
+        n_pairs (int): Planted cointegrated pairs.
+        p_value_threshold (float): The significance level for the cointegration test.
+        seed (int): Seed for the synthetic panel.
+        screen_function (callable, optional): screen_function(data, p_value_threshold,
+            pairs=...) returning cointegrated pairs. Defaults to
+            find_cointegrated_pairs_batched.
+        **filter_kwargs: Arguments passed on to candidate_pairs.
+
+    Returns:
+        dict: Candidate counts, 'recall' of the pairs found by the exhaustive
+              screen and 'planted_recall' of the planted pairs.
+    """
+    if screen_function is None:
+        screen_function = find_cointegrated_pairs_batched
+
+    data, planted_pairs = generate_cointegrated_universe(n_tickers, n_obs, n_pairs=n_pairs, seed=seed)
+    candidates = candidate_pairs(data, **filter_kwargs)
+
+    exhaustive = {frozenset(pair[:2]) for pair in screen_function(data, p_value_threshold)}
+    filtered = {frozenset(pair[:2]) for pair in screen_function(data, p_value_threshold, pairs=candidates)}
+    planted = {frozenset(pair[:2]) for pair in planted_pairs}
+
+    return {
+        'n_total_pairs': n_tickers * (n_tickers - 1) // 2,
+        'n_candidates': len(candidates),
+        'n_exhaustive_found': len(exhaustive),
+        'n_filtered_found': len(filtered),
+        'recall': len(exhaustive & filtered) / len(exhaustive) if exhaustive else 1.0,
+        'planted_recall': len(planted & filtered) / len(planted) if planted else 1.0,
+    }
@@ -9,3 +9,37 @@ END_DATE = "2023-12-31"
 P_VALUE_THRESHOLD = 0.05
 
 DATA_FILE_PATH = "data/stock_prices.csv"
+PRICE_STORE_PATH = "data/price_store"
+PRICE_STORE_DTYPE = "float64"
+MIN_TICKER_COVERAGE = 0.9
+
+ADF_MAXLAG = None
+ADF_AUTOLAG = 'AIC'
+SCREEN_BLOCK_SIZE = 256
+SCREEN_WORKERS = 1
+
+# Optional pre-filter before the cointegration screen: None tests every
+# pair, 'top_k' keeps each ticker's most correlated partners and 'cluster'
+# keeps pairs within the same group (SECTOR_GROUPS or correlation clusters).
+CANDIDATE_FILTER = None
+CANDIDATE_TOP_K = 10
+CANDIDATE_MIN_CORRELATION = None
+SECTOR_GROUPS = None
+
+PORTFOLIO_CAPITAL = 100000
+PORTFOLIO_WEIGHTS = None
+PORTFOLIO_REBALANCE = True
+
+REPORT_DIR = None
+REPORT_FORMATS = ['png']
+REPORT_WORKERS = 1
+
+RESULT_CACHE_PATH = "data/cache/results.sqlite"
+RESULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+USE_RESULT_CACHE = True
+
+ENABLE_INSTRUMENTATION = False
+INSTRUMENTATION_TRACE_MEMORY = True
+INSTRUMENTATION_REPORT_PATH = "reports/instrumentation.json"
+PROFILE_STAGES = []
+PROFILE_DIR = "reports/profiles"
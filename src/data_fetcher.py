@@ -1,43 +1,171 @@
 import yfinance as yf
 import pandas as pd
-import os
 
-def fetch_data(tickers, start_date, end_date, file_path):
+from src.price_store import (
+    is_csv_path, save_prices, store_exists, read_store_meta, load_prices, add_coverage, missing_ranges,
+    merge_prices
+)
+
+def fetch_data(tickers, start_date, end_date, file_path, dtype='float64'):
     """
-    Downloads historical 'Adj Close' prices for a list of tickers and saves them to a CSV file.
+    Downloads historical 'Adj Close' prices for a list of tickers and returns
+    them. A price store directory is brought up to date with update_data, so
+    only missing ranges are downloaded; a path ending in '.csv' is downloaded
+    in full and written as CSV, without coverage tracking.
 
     Args:
         tickers (list): A list of stock ticker symbols.
         start_date (str): The start date for the data in 'YYYY-MM-DD' format.
         end_date (str): The end date for the data in 'YYYY-MM-DD' format.
-        file_path (str): The path to save the resulting CSV file.
+        file_path (str): The price store directory or CSV file to save to.
+        dtype (str): 'float64' or 'float32' storage precision for a new store.
 
     Returns:
-        pd.DataFrame: A DataFrame containing the 'Adj Close' prices for the tickers.
-                      Returns None if data fetching fails.
-    """
-    print(f"Fetching data for {len(tickers)} tickers from {start_date} to {end_date}...")
-    
-    try:
-        data = yf.download(tickers, start=start_date, end=end_date, auto_adjust=False)
-        
-        if data.empty:
+        pd.DataFrame: A DataFrame containing the 'Adj Close' prices for the tickers,
+                      with missing prices as NaN. Returns None if data fetching fails.
+    """
+    if is_csv_path(file_path):
+        print(f"Fetching data for {len(tickers)} tickers from {start_date} to {end_date}...")
+        try:
+            prices = yfinance_download(tickers, start_date, end_date)
+        except Exception as e:
+            print(f"An error occurred while fetching data: {e}")
+            return None
+        prices = prices.dropna(axis=1, how='all')
+        if prices.empty:
             print("Error: No data downloaded. Check tickers and date range.")
             return None
-            
-        adj_close_prices = data['Adj Close']
-        
-        adj_close_prices.dropna(axis=1, how='all', inplace=True)
-        
-        adj_close_prices.dropna(axis=0, how='any', inplace=True)
-        
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        
-        adj_close_prices.to_csv(file_path)
+        save_prices(prices, file_path)
         print(f"Data successfully saved to {file_path}")
-        
-        return adj_close_prices
-        
-    except Exception as e:
-        print(f"An error occurred while fetching data: {e}")
+        return prices
+
+    update_data(tickers, start_date, end_date, file_path, dtype=dtype)
+    if not store_exists(file_path):
         return None
+
+    stored_tickers = read_store_meta(file_path)['tickers']
+    return load_prices(file_path, tickers=[ticker for ticker in tickers if ticker in stored_tickers],
+                       start_date=start_date, end_date=end_date)
+
+def yfinance_download(tickers, start_date, end_date):
+    """
+    Default downloader: fetches 'Adj Close' prices from Yahoo Finance.
+
+    Args:
+        tickers (list): A list of stock ticker symbols.
+        start_date (str): The start date, inclusive.
+        end_date (str): The end date, exclusive.
+
+    Returns:
+        pd.DataFrame: Prices indexed by date, one column per ticker. Rows and
+                      tickers with missing prices are kept as NaN.
+    """
+    data = yf.download(list(tickers), start=start_date, end=end_date, auto_adjust=False)
+    if data.empty:
+        return pd.DataFrame()
+
+    adj_close_prices = data['Adj Close']
+    if isinstance(adj_close_prices, pd.Series):
+        adj_close_prices = adj_close_prices.to_frame(tickers[0])
+    return adj_close_prices
+
+def frame_downloader(prices):
+    """
+    Builds an offline downloader that serves slices of an existing DataFrame,
+    with the same interface as yfinance_download.
+
+    Args:
+        prices (pd.DataFrame): Prices indexed by date, one column per ticker.
+
+    Returns:
+        callable: downloader(tickers, start_date, end_date) -> pd.DataFrame.
+    """
+    def download(tickers, start_date, end_date):
+        available = [ticker for ticker in tickers if ticker in prices.columns]
+        window = prices.loc[(prices.index >= pd.Timestamp(start_date)) & (prices.index < pd.Timestamp(end_date))]
+        return window[available]
+
+    return download
+
+def update_data(tickers, start_date, end_date, store_path, downloader=yfinance_download, dtype='float64'):
+    """
+    Brings a price store up to date for the given tickers and date range,
+    downloading only the (ticker, date range) blocks it does not hold yet.
+    Tickers with the same missing range are fetched in one request. Missing
+    prices are stored as NaN; alignment is left to load_prices. Ranges that
+    come back without any bars for any ticker, such as weekends and holidays,
+    are recorded as covered so they are not requested again.
+
+    Args:
+        tickers (list): A list of stock ticker symbols.
+        start_date (str): The start date, inclusive.
+        end_date (str): The end date, exclusive.
+        store_path (str): The price store directory.
+        downloader (callable): downloader(tickers, start_date, end_date) -> pd.DataFrame.
+        dtype (str): 'float64' or 'float32' storage precision for a new store.
+
+    Returns:
+        bool: True unless a download failed or returned some but not all tickers.
+    """
+    coverage = read_store_meta(store_path).get('coverage', {}) if store_exists(store_path) else {}
+
+    # No bar can exist after today, so later dates are never requested or
+    # marked covered; today's bar itself may still change and stays open.
+    today = pd.Timestamp.today().normalize()
+    request_end = min(pd.Timestamp(end_date), today + pd.Timedelta(days=1))
+
+    requests = {}
+    for ticker in tickers:
+        for gap in missing_ranges(coverage.get(ticker, []), start_date, request_end):
+            requests.setdefault(gap, []).append(ticker)
+
+    if not requests:
+        print(f"Price store '{store_path}' is up to date for {len(tickers)} tickers.")
+        return True
+
+    downloaded = []
+    complete = True
+    for (gap_start, gap_end), gap_tickers in requests.items():
+        print(f"Fetching {len(gap_tickers)} ticker(s) from {gap_start.date()} to {gap_end.date()}...")
+        try:
+            prices = downloader(gap_tickers, gap_start.strftime('%Y-%m-%d'), gap_end.strftime('%Y-%m-%d'))
+        except Exception as e:
+            print(f"An error occurred while fetching data: {e}")
+            complete = False
+            continue
+
+        if prices is None or prices.empty:
+            prices = pd.DataFrame()
+        prices = prices.dropna(axis=1, how='all')
+        covered_end = min(gap_end, today)
+
+        if prices.empty:
+            # A past range without a single bar for any ticker (a weekend or
+            # holiday) is complete as it is.
+            if covered_end > gap_start:
+                for ticker in gap_tickers:
+                    coverage[ticker] = add_coverage(coverage.get(ticker, []), gap_start, covered_end)
+            continue
+
+        # Tickers missing from an otherwise non-empty response failed to
+        # download and are left uncovered so the next update retries them.
+        missing = [ticker for ticker in gap_tickers if ticker not in prices.columns]
+        if missing:
+            print(f"No data returned for {len(missing)} ticker(s): {missing}")
+            complete = False
+        for ticker in gap_tickers:
+            if ticker not in missing and covered_end > gap_start:
+                coverage[ticker] = add_coverage(coverage.get(ticker, []), gap_start, covered_end)
+
+        downloaded.append(prices)
+
+    if not downloaded and not store_exists(store_path):
+        return False
+
+    new_prices = None
+    for prices in downloaded:
+        new_prices = prices if new_prices is None else prices.combine_first(new_prices)
+
+    merge_prices(store_path, new_prices, coverage, dtype=dtype)
+    print(f"Price store '{store_path}' updated.")
+    return complete
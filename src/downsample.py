@@ -0,0 +1,62 @@
+import numpy as np
+
+def minmax_indices(values, n_buckets):
+    """
+    Picks the positions to plot for a long series so the drawn line keeps
+    its visual extremes: the series is split into `n_buckets` equal buckets
+    and the minimum and maximum of each are kept, together with the first
+    and last point. With one bucket per horizontal pixel the result looks
+    the same as plotting every point.
+
+    Args:
+        values (array-like): 1-D series. NaNs are ignored when picking extremes.
+        n_buckets (int): Number of buckets, usually the plot width in pixels.
+
+    Returns:
+        np.ndarray: Sorted integer positions, at most 2 * n_buckets + 2 of them.
+                    All positions if the series is short enough already.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n_buckets < 1 or n <= 2 * n_buckets:
+        return np.arange(n)
+
+    bucket_size = -(-n // n_buckets)
+    n_buckets = -(-n // bucket_size)
+    padded_length = n_buckets * bucket_size
+
+    low = np.full(padded_length, np.inf)
+    high = np.full(padded_length, -np.inf)
+    finite = np.isfinite(values)
+    low[:n][finite] = values[finite]
+    high[:n][finite] = values[finite]
+
+    offsets = np.arange(n_buckets) * bucket_size
+    argmin = low.reshape(n_buckets, bucket_size).argmin(axis=1) + offsets
+    argmax = high.reshape(n_buckets, bucket_size).argmax(axis=1) + offsets
+
+    positions = np.concatenate([[0, n - 1], argmin, argmax])
+    return np.unique(positions[positions < n])
+
+def downsample_frame(frame, columns, n_buckets, keep=None):
+    """
+    Downsamples several columns of a DataFrame onto one shared set of rows,
+    the union of the min/max positions of every column, so the columns stay
+    aligned for plotting and band fills.
+
+    Args:
+        frame (pd.DataFrame): Time-indexed frame to downsample.
+        columns (list): Columns whose extremes must be kept.
+        n_buckets (int): Number of buckets, usually the plot width in pixels.
+        keep (array-like, optional): Row positions that are always kept, e.g.
+            the bars where a trade opens or closes.
+
+    Returns:
+        pd.DataFrame: The selected rows of `frame`.
+    """
+    if n_buckets < 1 or len(frame) <= 2 * n_buckets:
+        return frame
+    positions = np.unique(np.concatenate([
+        minmax_indices(frame[column].to_numpy(), n_buckets) for column in columns
+    ] + ([] if keep is None else [np.asarray(keep, dtype=np.int64)])))
+    return frame.iloc[positions]
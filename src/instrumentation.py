@@ -0,0 +1,176 @@
+import contextlib
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None
+
+class Instrumentation:
+    """
+    Records wall time, CPU time, peak memory and item counts for each stage
+    of the pipeline, plus finer-grained timings (e.g. per pair) reported by
+    the stages themselves, and writes them as a JSON report.
+
+    When disabled every method is a cheap no-op, so the hooks can stay in
+    the pipeline permanently. Stages are meant to be run one after another,
+    not nested, since the memory peak is reset at the start of each stage.
+    """
+
+    def __init__(self, enabled=False, trace_memory=True, profile_stages=(), profile_dir=None):
+        """
+        Args:
+            enabled (bool): Whether to record anything at all.
+            trace_memory (bool): Track the Python heap peak per stage with
+                tracemalloc. Slows NumPy-heavy stages somewhat.
+            profile_stages (iterable): Names of stages to run under cProfile.
+            profile_dir (str, optional): Directory for the .prof files of
+                profiled stages. Defaults to not writing them.
+        """
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.profile_stages = set(profile_stages)
+        self.profile_dir = profile_dir
+        self.stages = []
+        self.timings = {}
+        self.notes = {}
+        self.started_at = datetime.now(timezone.utc).isoformat()
+
+    def stage(self, name, items=None):
+        """
+        Context manager that measures one pipeline stage. The body may set
+        the item count after the fact through the yielded dict:
+
+            with instrumentation.stage('screen') as stage:
+                pairs = ...
+                stage['items'] = len(pairs)
+
+        Args:
+            name (str): Stage name used in the report.
+            items (int, optional): Number of items processed, if known up front.
+        """
+        if not self.enabled:
+            return contextlib.nullcontext({})
+        return self._measure_stage(name, items)
+
+    @contextlib.contextmanager
+    def _measure_stage(self, name, items):
+        record = {'stage': name, 'items': items}
+
+        tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        elif self.trace_memory:
+            tracemalloc.reset_peak()
+
+        profiler = cProfile.Profile() if name in self.profile_stages else None
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        if profiler is not None:
+            profiler.enable()
+
+        try:
+            yield record
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            record['wall_seconds'] = time.perf_counter() - wall_start
+            record['cpu_seconds'] = time.process_time() - cpu_start
+
+            if self.trace_memory:
+                record['peak_traced_bytes'] = tracemalloc.get_traced_memory()[1]
+                if tracing:
+                    tracemalloc.stop()
+            if resource is not None:
+                # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+                max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                record['max_rss_bytes'] = max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+            if profiler is not None:
+                record['profile'] = self._summarize_profile(name, profiler)
+            self.stages.append(record)
+
+    def _summarize_profile(self, name, profiler, top=25):
+        """
+        Returns the top functions by cumulative time and optionally dumps the
+        full profile to `profile_dir`.
+        """
+        summary = {}
+        if self.profile_dir is not None:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            path = os.path.join(self.profile_dir, f"{name}.prof")
+            profiler.dump_stats(path)
+            summary['stats_file'] = path
+
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(top)
+        summary['top_cumulative'] = stream.getvalue()
+        return summary
+
+    def record_timing(self, kind, **fields):
+        """
+        Records one fine-grained timing entry (e.g. one pair or block of the
+        screen) under `kind`. Does nothing when disabled.
+        """
+        if self.enabled:
+            self.timings.setdefault(kind, []).append(fields)
+
+    def annotate(self, kind, note):
+        """
+        Attaches a note to the timings recorded under `kind`, e.g. to say that
+        they are averages or that some items were not timed. Repeated notes
+        for the same kind are kept once. Does nothing when disabled.
+        """
+        if self.enabled:
+            notes = self.notes.setdefault(kind, [])
+            if note not in notes:
+                notes.append(note)
+
+    def report(self):
+        """
+        Returns the collected measurements as a JSON-serializable dict.
+        """
+        return {
+            'started_at': self.started_at,
+            'stages': self.stages,
+            'total_wall_seconds': sum(stage['wall_seconds'] for stage in self.stages),
+            'timings': self.timings,
+            'notes': self.notes,
+        }
+
+    def write_report(self, path):
+        """
+        Writes the JSON report to `path`. Does nothing when disabled.
+        """
+        if not self.enabled:
+            return
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        print(f"Instrumentation report saved to {path}")
+
+    def print_summary(self):
+        """
+        Prints a one-line summary per stage. Does nothing when disabled.
+        """
+        if not self.enabled:
+            return
+        print("\n--- Pipeline Stage Timings ---")
+        for stage in self.stages:
+            line = f"  {stage['stage']}: {stage['wall_seconds']:.3f}s wall, {stage['cpu_seconds']:.3f}s CPU"
+            if 'peak_traced_bytes' in stage:
+                line += f", peak {stage['peak_traced_bytes'] / 1e6:.1f} MB"
+            if stage['items'] is not None:
+                line += f", {stage['items']} items"
+            print(line)
+        for kind, notes in self.notes.items():
+            for note in notes:
+                print(f"  note ({kind}): {note}")
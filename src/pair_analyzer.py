@@ -2,39 +2,53 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
-def analyze_and_plot_pair(data, pair):
+from src.downsample import downsample_frame
+
+def draw_pair_analysis(fig, axes, data, pair, window=30, max_points=None):
     """
-    Analyzes a given pair of stocks and plots their price ratio, moving average,
-    and trading bands (z-score).
+    Draws the price ratio, its Bollinger bands and the z-score of a pair
+    onto existing axes. Long series are downsampled to the min/max of each
+    pixel column of the figure.
 
     Args:
+        fig (matplotlib.figure.Figure): The figure holding `axes`.
+        axes (tuple): The (ratio, z-score) axes.
         data (pd.DataFrame): DataFrame containing the price data for all stocks.
         pair (tuple): A tuple containing the tickers of the two stocks in the pair.
+        window (int): The rolling window for the moving average and standard deviation.
+        max_points (int, optional): Number of min/max buckets per line.
+            Defaults to the figure width in pixels.
     """
     stock1_ticker, stock2_ticker = pair[0], pair[1]
-    
-    print(f"\nAnalyzing and plotting pair: {stock1_ticker} vs {stock2_ticker}")
+    ax1, ax2 = axes
 
     price_ratio = data[stock1_ticker] / data[stock2_ticker]
 
-    window = 30
     moving_avg = price_ratio.rolling(window=window, center=False).mean()
     moving_std = price_ratio.rolling(window=window, center=False).std()
 
     z_score = (price_ratio - moving_avg) / moving_std
 
-    plt.style.use('seaborn-v0_8-darkgrid')
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(15, 10), sharex=True,
-                                   gridspec_kw={'height_ratios': [2, 1]})
-    
+    if max_points is None:
+        max_points = int(fig.get_figwidth() * fig.dpi)
+    frame = downsample_frame(pd.DataFrame({
+        'price_ratio': price_ratio,
+        'moving_avg': moving_avg,
+        'upper_2': moving_avg + 2*moving_std,
+        'lower_2': moving_avg - 2*moving_std,
+        'upper_1': moving_avg + moving_std,
+        'lower_1': moving_avg - moving_std,
+        'z_score': z_score,
+    }), ['price_ratio', 'upper_2', 'lower_2', 'z_score'], max_points)
+
     fig.suptitle(f'Pairs Trading Analysis: {stock1_ticker} and {stock2_ticker}', fontsize=16)
 
-    ax1.plot(price_ratio.index, price_ratio, label='Price Ratio (S1/S2)', color='royalblue', lw=1.5)
-    ax1.plot(moving_avg.index, moving_avg, label=f'{window}-Day Moving Avg', color='darkorange', lw=2, linestyle='--')
-    
-    ax1.fill_between(moving_avg.index, moving_avg - 2*moving_std, moving_avg + 2*moving_std,
+    ax1.plot(frame.index, frame['price_ratio'], label='Price Ratio (S1/S2)', color='royalblue', lw=1.5)
+    ax1.plot(frame.index, frame['moving_avg'], label=f'{window}-Day Moving Avg', color='darkorange', lw=2, linestyle='--')
+
+    ax1.fill_between(frame.index, frame['lower_2'], frame['upper_2'],
                      color='gray', alpha=0.2, label='+/- 2 Std Dev')
-    ax1.fill_between(moving_avg.index, moving_avg - moving_std, moving_avg + moving_std,
+    ax1.fill_between(frame.index, frame['lower_1'], frame['upper_1'],
                      color='gray', alpha=0.3, label='+/- 1 Std Dev')
 
     ax1.set_title('Price Ratio and Bollinger Bands')
@@ -42,8 +56,8 @@ def analyze_and_plot_pair(data, pair):
     ax1.legend()
     ax1.grid(True)
 
-    ax2.plot(z_score.index, z_score, label='Z-Score', color='forestgreen', lw=1.5)
-    
+    ax2.plot(frame.index, frame['z_score'], label='Z-Score', color='forestgreen', lw=1.5)
+
     ax2.axhline(2.0, color='red', linestyle='--', lw=1, label='Sell Signal (Short S1, Long S2)')
     ax2.axhline(1.0, color='red', linestyle=':', lw=1)
     ax2.axhline(0.0, color='black', linestyle='--', lw=1)
@@ -56,5 +70,24 @@ def analyze_and_plot_pair(data, pair):
     ax2.legend(loc='upper left')
     ax2.grid(True)
 
+def analyze_and_plot_pair(data, pair):
+    """
+    Analyzes a given pair of stocks and plots their price ratio, moving average,
+    and trading bands (z-score).
+
+    Args:
+        data (pd.DataFrame): DataFrame containing the price data for all stocks.
+        pair (tuple): A tuple containing the tickers of the two stocks in the pair.
+    """
+    stock1_ticker, stock2_ticker = pair[0], pair[1]
+
+    print(f"\nAnalyzing and plotting pair: {stock1_ticker} vs {stock2_ticker}")
+
+    plt.style.use('seaborn-v0_8-darkgrid')
+    fig, axes = plt.subplots(2, 1, figsize=(15, 10), sharex=True,
+                             gridspec_kw={'height_ratios': [2, 1]})
+
+    draw_pair_analysis(fig, axes, data, pair)
+
     plt.tight_layout(rect=[0, 0, 1, 0.96])
     plt.show()
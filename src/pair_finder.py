@@ -2,15 +2,24 @@ import pandas as pd
 import numpy as np
 import statsmodels.api as sm
 from statsmodels.tsa.stattools import adfuller
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from itertools import combinations
 
-def find_cointegrated_pairs(data, p_value_threshold):
+from src.batch_adf import batch_adfuller
+from src.result_cache import cached_screen_pairs
+
+def find_cointegrated_pairs(data, p_value_threshold, instrumentation=None):
     """
     Finds cointegrated pairs of stocks from a DataFrame of prices.
 
     Args:
         data (pd.DataFrame): DataFrame with stock prices, where columns are tickers.
         p_value_threshold (float): The significance level for the cointegration test.
+        instrumentation (Instrumentation, optional): Receives per-pair OLS and
+            ADF timings under 'screen_pairs'.
 
     Returns:
         list: A list of tuples, where each tuple contains the pair of tickers,
@@ -32,6 +41,9 @@ def find_cointegrated_pairs(data, p_value_threshold):
         stock1_prices = data[stock1_ticker]
         stock2_prices = data[stock2_ticker]
 
+        if instrumentation is not None:
+            ols_start = time.perf_counter()
+
         stock1_with_const = sm.add_constant(stock1_prices)
         model = sm.OLS(stock2_prices, stock1_with_const).fit()
         hedge_ratio = model.params[stock1_ticker]
@@ -39,10 +51,17 @@ def find_cointegrated_pairs(data, p_value_threshold):
 
         spread = stock2_prices - hedge_ratio * stock1_prices
 
+        if instrumentation is not None:
+            adf_start = time.perf_counter()
 
         adf_result = adfuller(spread)
         p_value = adf_result[1]
 
+        if instrumentation is not None:
+            instrumentation.record_timing('screen_pairs', pair=f"{stock1_ticker}/{stock2_ticker}",
+                                          ols_seconds=adf_start - ols_start,
+                                          adf_seconds=time.perf_counter() - adf_start)
+
         if p_value < p_value_threshold:
             print(f"  >> Found cointegrated pair: {stock1_ticker} and {stock2_ticker} (p-value: {p_value:.4f})")
             cointegrated_pairs.append((stock1_ticker, stock2_ticker, p_value, hedge_ratio))
@@ -50,3 +69,224 @@ def find_cointegrated_pairs(data, p_value_threshold):
     cointegrated_pairs.sort(key=lambda x: x[2])
     
     return cointegrated_pairs
+
+def compute_hedge_ratios(prices, first_idx, second_idx):
+    """
+    Computes OLS hedge ratios (with intercept) for many pairs from one shared
+    matrix of column means, variances and covariances.
+
+    Args:
+        prices (np.ndarray): 2-D array of prices with shape (n_obs, n_stocks).
+        first_idx (np.ndarray): Column indices of the regressor stock per pair.
+        second_idx (np.ndarray): Column indices of the dependent stock per pair.
+
+    Returns:
+        np.ndarray: The hedge ratio (slope) for each pair.
+    """
+    centered = prices - prices.mean(axis=0)
+    cov = centered.T @ centered
+    return cov[first_idx, second_idx] / cov[first_idx, first_idx]
+
+def _screen_block(prices, first_idx, second_idx, hedge_ratios, maxlag, autolag, block_size,
+                  timings=None, offset=0):
+    """
+    Runs the ADF test on the spreads of a run of pairs, `block_size` pairs per
+    stacked solve, and returns their p-values. If a `timings` list is given,
+    one record per block is appended to it; pairs in a block are solved
+    together, so their per-pair time is the block average. `offset` is the
+    position of the first pair in the full pair list.
+    """
+    p_values = np.empty(len(hedge_ratios))
+
+    for start in range(0, len(hedge_ratios), block_size):
+        if timings is not None:
+            block_start = time.perf_counter()
+
+        block = slice(start, start + block_size)
+        spreads = prices[:, second_idx[block]] - hedge_ratios[block] * prices[:, first_idx[block]]
+        _, p_values[block], _ = batch_adfuller(spreads, maxlag=maxlag, autolag=autolag)
+
+        if timings is not None:
+            seconds = time.perf_counter() - block_start
+            n_pairs = len(hedge_ratios[block])
+            timings.append({'first_pair': offset + start, 'n_pairs': n_pairs, 'seconds': seconds,
+                            'seconds_per_pair': seconds / n_pairs, 'worker': os.getpid()})
+
+    return p_values
+
+_shared_prices = None
+
+def _init_worker(prices_path):
+    """
+    Pool initializer: maps the shared price matrix once per worker process.
+    """
+    global _shared_prices
+    _shared_prices = np.load(prices_path, mmap_mode='r')
+
+def _screen_chunk(args):
+    """
+    Pool task: screens one chunk of pairs against the shared price matrix.
+    Returns the p-values and, if requested, the chunk's timing record with
+    its per-block timings.
+    """
+    first_idx, second_idx, hedge_ratios, maxlag, autolag, block_size, offset, collect_timings = args
+    chunk_start = time.perf_counter()
+    blocks = [] if collect_timings else None
+    p_values = _screen_block(_shared_prices, first_idx, second_idx, hedge_ratios, maxlag, autolag,
+                             block_size, timings=blocks, offset=offset)
+
+    timing = None
+    if collect_timings:
+        seconds = time.perf_counter() - chunk_start
+        timing = {'first_pair': offset, 'n_pairs': len(hedge_ratios), 'seconds': seconds,
+                  'seconds_per_pair': seconds / len(hedge_ratios), 'worker': os.getpid(),
+                  'blocks': blocks}
+    return p_values, timing
+
+def _screen_parallel(prices, first_idx, second_idx, hedge_ratios, maxlag, autolag, block_size, workers,
+                     collect_timings=False):
+    """
+    Splits the pairs into chunks and screens them on a process pool. The price
+    matrix is written once to a temporary .npy file that every worker
+    memory-maps, so no worker receives its own pickled copy of the data.
+
+    Returns:
+        tuple: (p_values, chunk_timings); chunk_timings is empty unless
+               `collect_timings` is set.
+    """
+    n_pairs = len(hedge_ratios)
+    chunk_size = max(block_size, -(-n_pairs // (workers * 4)))
+    tasks = [
+        (first_idx[start:start + chunk_size], second_idx[start:start + chunk_size],
+         hedge_ratios[start:start + chunk_size], maxlag, autolag, block_size, start, collect_timings)
+        for start in range(0, n_pairs, chunk_size)
+    ]
+
+    fd, prices_path = tempfile.mkstemp(suffix='.npy')
+    os.close(fd)
+    try:
+        np.save(prices_path, prices)
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)),
+                                 initializer=_init_worker,
+                                 initargs=(prices_path,)) as executor:
+            chunks = list(executor.map(_screen_chunk, tasks))
+    finally:
+        os.remove(prices_path)
+
+    p_values = np.concatenate([chunk_p_values for chunk_p_values, _ in chunks])
+    return p_values, [timing for _, timing in chunks if timing is not None]
+
+def screen_pairs(data, pairs=None, maxlag=None, autolag='AIC', block_size=256, workers=1,
+                 instrumentation=None):
+    """
+    Runs the hedge-ratio regression and ADF test for a list of pairs using
+    stacked NumPy solves over blocks of pairs.
+
+    Args:
+        data (pd.DataFrame): DataFrame with stock prices, where columns are tickers.
+        pairs (list, optional): Pairs of tickers to test. Defaults to all combinations.
+        maxlag (int, optional): Maximum ADF lag. Defaults to adfuller's rule.
+        autolag (str, optional): 'AIC', 'BIC', or None for a fixed maxlag.
+        block_size (int): Number of pairs tested per stacked solve.
+        workers (int): Number of worker processes. 1 runs serially in-process.
+        instrumentation (Instrumentation, optional): Receives the hedge-ratio
+            time, per-block timings and, when run in parallel, per-chunk timings.
+
+    Returns:
+        list: A tuple (ticker1, ticker2, p_value, hedge_ratio) for every pair,
+              in the order the pairs were given.
+    """
+    if pairs is None:
+        pairs = list(combinations(data.columns, 2))
+    if not pairs:
+        return []
+
+    prices = data.to_numpy(dtype=np.float64)
+    column_index = {ticker: i for i, ticker in enumerate(data.columns)}
+    first_idx = np.array([column_index[pair[0]] for pair in pairs])
+    second_idx = np.array([column_index[pair[1]] for pair in pairs])
+
+    if instrumentation is not None:
+        hedge_start = time.perf_counter()
+    hedge_ratios = compute_hedge_ratios(prices, first_idx, second_idx)
+    if instrumentation is not None:
+        instrumentation.record_timing('screen_hedge_ratios', n_pairs=len(pairs),
+                                      seconds=time.perf_counter() - hedge_start)
+        instrumentation.annotate(
+            'screen_blocks', "Pairs are solved together in blocks; seconds_per_pair is the "
+            "block average, not a measurement of the individual pair.")
+
+    if workers > 1 and len(pairs) > block_size:
+        p_values, chunk_timings = _screen_parallel(prices, first_idx, second_idx, hedge_ratios,
+                                                   maxlag, autolag, block_size, workers,
+                                                   collect_timings=instrumentation is not None)
+        if instrumentation is not None:
+            instrumentation.annotate(
+                'screen_chunks', f"Screen ran on {workers} worker processes; each chunk's time "
+                "is measured inside its worker and chunks overlap in wall time.")
+            for timing in chunk_timings:
+                blocks = timing.pop('blocks')
+                instrumentation.record_timing('screen_chunks', **timing)
+                for block in blocks:
+                    instrumentation.record_timing('screen_blocks', **block)
+    else:
+        blocks = [] if instrumentation is not None else None
+        p_values = _screen_block(prices, first_idx, second_idx, hedge_ratios,
+                                 maxlag, autolag, block_size, timings=blocks)
+        for block in blocks or []:
+            instrumentation.record_timing('screen_blocks', **block)
+
+    return [
+        (pair[0], pair[1], float(p_value), float(hedge_ratio))
+        for pair, p_value, hedge_ratio in zip(pairs, p_values, hedge_ratios)
+    ]
+
+def find_cointegrated_pairs_batched(data, p_value_threshold, maxlag=None, autolag='AIC', block_size=256, workers=1,
+                                    cache=None, instrumentation=None, pairs=None):
+    """
+    Batched equivalent of find_cointegrated_pairs. Hedge ratios come from a
+    single covariance matrix and the ADF regressions are solved for blocks
+    of pairs at a time.
+
+    Args:
+        data (pd.DataFrame): DataFrame with stock prices, where columns are tickers.
+        p_value_threshold (float): The significance level for the cointegration test.
+        maxlag (int, optional): Maximum ADF lag. Defaults to adfuller's rule.
+        autolag (str, optional): 'AIC', 'BIC', or None for a fixed maxlag.
+        block_size (int): Number of pairs tested per stacked solve.
+        workers (int): Number of worker processes. 1 runs serially in-process.
+        cache (ResultCache, optional): Per-pair result cache; only pairs not
+            already cached for the same price data and parameters are tested.
+        instrumentation (Instrumentation, optional): Receives per-block screen timings.
+        pairs (list, optional): Candidate pairs to test, e.g. from
+            candidate_filter.candidate_pairs. Defaults to all combinations.
+
+    Returns:
+        list: A list of tuples, where each tuple contains the pair of tickers,
+              the p-value of the cointegration test, and the hedge ratio.
+    """
+    n_stocks = data.shape[1]
+
+    print(f"Searching for cointegrated pairs among {n_stocks} stocks...")
+
+    pairs_to_test = list(combinations(data.columns, 2)) if pairs is None else list(pairs)
+    print(f"Testing {len(pairs_to_test)} unique pairs...")
+
+    if cache is not None:
+        results = cached_screen_pairs(data, cache, pairs_to_test, screen_pairs, maxlag=maxlag,
+                                      autolag=autolag, block_size=block_size, workers=workers,
+                                      instrumentation=instrumentation)
+    else:
+        results = screen_pairs(data, pairs_to_test, maxlag=maxlag, autolag=autolag,
+                               block_size=block_size, workers=workers,
+                               instrumentation=instrumentation)
+
+    cointegrated_pairs = []
+    for stock1_ticker, stock2_ticker, p_value, hedge_ratio in results:
+        if p_value < p_value_threshold:
+            print(f"  >> Found cointegrated pair: {stock1_ticker} and {stock2_ticker} (p-value: {p_value:.4f})")
+            cointegrated_pairs.append((stock1_ticker, stock2_ticker, p_value, hedge_ratio))
+
+    cointegrated_pairs.sort(key=lambda x: x[2])
+
+    return cointegrated_pairs
@@ -2,9 +2,12 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
-def calculate_performance_metrics(portfolio_df):
+from src.downsample import downsample_frame
+
+def calculate_numeric_performance_metrics(portfolio_df):
     """
-    Calculates key performance metrics from a portfolio DataFrame.
+    Calculates the same metrics as calculate_performance_metrics as plain
+    floats (fractions, not percentages), so results can be sorted and ranked.
 
     Args:
         portfolio_df (pd.DataFrame): DataFrame with strategy returns.
@@ -13,56 +16,86 @@ def calculate_performance_metrics(portfolio_df):
         dict: A dictionary containing performance metrics.
     """
     metrics = {}
-    
+
     total_return = portfolio_df['cumulative_returns'].iloc[-1] - 1
-    metrics['Total Return'] = f"{total_return:.2%}"
-    
+    metrics['Total Return'] = float(total_return)
+
     days = (portfolio_df.index[-1] - portfolio_df.index[0]).days
     annualized_return = (1 + total_return) ** (365.0 / days) - 1
-    metrics['Annualized Return'] = f"{annualized_return:.2%}"
+    metrics['Annualized Return'] = float(annualized_return)
 
     annualized_volatility = portfolio_df['strategy_returns'].std() * np.sqrt(252)
-    metrics['Annualized Volatility'] = f"{annualized_volatility:.2%}"
+    metrics['Annualized Volatility'] = float(annualized_volatility)
 
     sharpe_ratio = annualized_return / annualized_volatility if annualized_volatility != 0 else 0
-    metrics['Sharpe Ratio'] = f"{sharpe_ratio:.2f}"
+    metrics['Sharpe Ratio'] = float(sharpe_ratio)
 
     cumulative_returns = portfolio_df['cumulative_returns']
     running_max = cumulative_returns.cummax()
     drawdown = (cumulative_returns - running_max) / running_max
     max_drawdown = drawdown.min()
-    metrics['Maximum Drawdown'] = f"{max_drawdown:.2%}"
+    metrics['Maximum Drawdown'] = float(max_drawdown)
 
     return metrics
 
-def plot_performance(portfolio_df, pair_info):
+def calculate_performance_metrics(portfolio_df):
     """
-    Plots the equity curve and z-score for the backtest.
+    Calculates key performance metrics from a portfolio DataFrame.
+
+    Args:
+        portfolio_df (pd.DataFrame): DataFrame with strategy returns.
+
+    Returns:
+        dict: A dictionary containing performance metrics.
+    """
+    metrics = calculate_numeric_performance_metrics(portfolio_df)
+
+    return {
+        metric: f"{value:.2f}" if metric == 'Sharpe Ratio' else f"{value:.2%}"
+        for metric, value in metrics.items()
+    }
+
+def draw_performance(fig, axes, portfolio_df, pair_info, max_points=None):
+    """
+    Draws the equity curve and z-score with trading signals onto existing
+    axes. Long series are downsampled to the min/max of each pixel column
+    of the figure.
+
+    Args:
+        fig (matplotlib.figure.Figure): The figure holding `axes`.
+        axes (tuple): The (equity, z-score) axes.
+        portfolio_df (pd.DataFrame): The backtest frame.
+        pair_info (tuple): Tuple containing pair tickers, p-value, and hedge ratio.
+        max_points (int, optional): Number of min/max buckets per line.
+            Defaults to the figure width in pixels.
     """
     stock1_ticker, stock2_ticker, _, _ = pair_info
-    
-    plt.style.use('seaborn-v0_8-darkgrid')
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(15, 12), sharex=True,
-                                   gridspec_kw={'height_ratios': [2, 1]})
+    ax1, ax2 = axes
+
+    if max_points is None:
+        max_points = int(fig.get_figwidth() * fig.dpi)
+    # Always keep the bars where the position changes so no trade loses its marker.
+    trade_bars = np.flatnonzero(np.diff(portfolio_df['position'].to_numpy())) + 1
+    frame = downsample_frame(portfolio_df, ['cumulative_returns', 'z_score'], max_points, keep=trade_bars)
     
     fig.suptitle(f'Backtest Performance: {stock1_ticker} and {stock2_ticker}', fontsize=16)
 
-    ax1.plot(portfolio_df['cumulative_returns'], label='Strategy Cumulative Returns', color='royalblue', lw=2)
+    ax1.plot(frame['cumulative_returns'], label='Strategy Cumulative Returns', color='royalblue', lw=2)
     ax1.set_title('Equity Curve')
     ax1.set_ylabel('Cumulative Returns')
     ax1.legend()
     ax1.grid(True)
 
-    ax2.plot(portfolio_df['z_score'], label='Z-Score', color='forestgreen', lw=1.5)
+    ax2.plot(frame['z_score'], label='Z-Score', color='forestgreen', lw=1.5)
     ax2.axhline(2.0, color='red', linestyle='--', lw=1)
     ax2.axhline(-2.0, color='green', linestyle='--', lw=1)
     ax2.axhline(0.0, color='black', linestyle=':', lw=1)
     
-    long_signals = portfolio_df[portfolio_df['position'] == 1].index
-    short_signals = portfolio_df[portfolio_df['position'] == -1].index
+    long_signals = frame[frame['position'] == 1].index
+    short_signals = frame[frame['position'] == -1].index
     
-    ax2.plot(long_signals, portfolio_df.loc[long_signals]['z_score'], '^', markersize=8, color='g', label='Long Spread')
-    ax2.plot(short_signals, portfolio_df.loc[short_signals]['z_score'], 'v', markersize=8, color='r', label='Short Spread')
+    ax2.plot(long_signals, frame.loc[long_signals]['z_score'], '^', markersize=8, color='g', label='Long Spread')
+    ax2.plot(short_signals, frame.loc[short_signals]['z_score'], 'v', markersize=8, color='r', label='Short Spread')
 
     ax2.set_title('Z-Score and Trading Signals')
     ax2.set_ylabel('Z-Score')
@@ -70,5 +103,15 @@ def plot_performance(portfolio_df, pair_info):
     ax2.legend(loc='upper left')
     ax2.grid(True)
 
+def plot_performance(portfolio_df, pair_info):
+    """
+    Plots the equity curve and z-score for the backtest.
+    """
+    plt.style.use('seaborn-v0_8-darkgrid')
+    fig, axes = plt.subplots(2, 1, figsize=(15, 12), sharex=True,
+                             gridspec_kw={'height_ratios': [2, 1]})
+
+    draw_performance(fig, axes, portfolio_df, pair_info)
+
     plt.tight_layout(rect=[0, 0, 1, 0.96])
     plt.show()
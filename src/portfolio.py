@@ -0,0 +1,130 @@
+import pandas as pd
+import numpy as np
+
+from src.backtester import compute_positions_matrix
+
+PAIR_COLUMNS = [
+    's1_price', 's2_price', 'spread', 'moving_avg', 'moving_std',
+    'z_score', 'position', 'strategy_returns', 'cumulative_returns'
+]
+
+def pair_label(pair_info):
+    """
+    Returns the column label used for a pair in portfolio results, e.g. 'AAPL/MSFT'.
+    """
+    return f"{pair_info[0]}/{pair_info[1]}"
+
+def _allocation_weights(n_pairs, weights):
+    """
+    Normalizes the capital allocation so the pair weights sum to one.
+    """
+    if weights is None:
+        return np.full(n_pairs, 1.0 / n_pairs)
+
+    weights = np.asarray(weights, dtype=np.float64)
+    if weights.shape != (n_pairs,):
+        raise ValueError(f"Expected {n_pairs} weights, got {weights.shape[0]}.")
+    if weights.sum() <= 0:
+        raise ValueError("Portfolio weights must sum to a positive value.")
+    return weights / weights.sum()
+
+def run_portfolio_backtest(data, pairs, window=30, entry_threshold=2.0, exit_threshold=0.5,
+                           stop_loss_threshold=3.0, weights=None, capital=1.0, rebalance=True):
+    """
+    Backtests every pair in one pass, with spreads, z-scores, positions and
+    returns held as 2-D (time x pair) arrays, and combines them into a
+    portfolio equity curve.
+
+    Args:
+        data (pd.DataFrame): DataFrame with historical price data.
+        pairs (list): Pair tuples as returned by find_cointegrated_pairs.
+        window (int): Rolling window for the spread mean and standard deviation.
+        entry_threshold (float): |z| above which a new position is opened.
+        exit_threshold (float): |z| below which an open position is closed.
+        stop_loss_threshold (float): |z| above which an open position is stopped out.
+        weights (array-like, optional): Capital allocation per pair. Defaults to equal weights.
+        capital (float): Starting capital of the portfolio.
+        rebalance (bool): If True, weights are restored every bar (constant mix).
+                          If False, each pair's capital compounds on its own.
+
+    Returns:
+        dict: 'portfolio' holds a DataFrame with 'strategy_returns',
+              'cumulative_returns' and 'equity'; 'weights' holds the allocation
+              per pair; every name in PAIR_COLUMNS maps to a time x pair
+              DataFrame labelled by pair_label.
+    """
+    if not pairs:
+        raise ValueError("No pairs to backtest.")
+
+    print(f"\n--- Running Portfolio Backtest for {len(pairs)} Pair(s) ---")
+
+    labels = [pair_label(pair_info) for pair_info in pairs]
+    hedge_ratios = np.array([pair_info[3] for pair_info in pairs], dtype=np.float64)
+    weights = _allocation_weights(len(pairs), weights)
+
+    s1_prices = data[[pair_info[0] for pair_info in pairs]].to_numpy(dtype=np.float64)
+    s2_prices = data[[pair_info[1] for pair_info in pairs]].to_numpy(dtype=np.float64)
+
+    spread = s2_prices - hedge_ratios * s1_prices
+    rolling = pd.DataFrame(spread).rolling(window=window)
+    moving_avg = rolling.mean().to_numpy()
+    moving_std = rolling.std().to_numpy()
+    z_score = (spread - moving_avg) / moving_std
+
+    position = compute_positions_matrix(z_score, entry_threshold, exit_threshold, stop_loss_threshold)
+
+    s1_returns = np.full(s1_prices.shape, np.nan)
+    s2_returns = np.full(s2_prices.shape, np.nan)
+    s1_returns[1:] = s1_prices[1:] / s1_prices[:-1] - 1
+    s2_returns[1:] = s2_prices[1:] / s2_prices[:-1] - 1
+
+    strategy_returns = np.zeros(spread.shape)
+    strategy_returns[1:] = position[:-1] * (hedge_ratios * s1_returns[1:] - s2_returns[1:])
+    strategy_returns = np.nan_to_num(strategy_returns, nan=0.0)
+    cumulative_returns = np.cumprod(1 + strategy_returns, axis=0)
+
+    if rebalance:
+        portfolio_returns = strategy_returns @ weights
+        portfolio_cumulative = np.cumprod(1 + portfolio_returns)
+    else:
+        portfolio_cumulative = cumulative_returns @ weights
+        portfolio_returns = np.zeros(len(portfolio_cumulative))
+        portfolio_returns[1:] = portfolio_cumulative[1:] / portfolio_cumulative[:-1] - 1
+
+    portfolio = pd.DataFrame({
+        'strategy_returns': portfolio_returns,
+        'cumulative_returns': portfolio_cumulative,
+        'equity': capital * portfolio_cumulative,
+    }, index=data.index)
+
+    arrays = {
+        's1_price': s1_prices, 's2_price': s2_prices, 'spread': spread,
+        'moving_avg': moving_avg, 'moving_std': moving_std, 'z_score': z_score,
+        'position': position, 'strategy_returns': strategy_returns,
+        'cumulative_returns': cumulative_returns,
+    }
+
+    results = {
+        'portfolio': portfolio,
+        'weights': pd.Series(weights, index=labels),
+    }
+    for column in PAIR_COLUMNS:
+        results[column] = pd.DataFrame(arrays[column], index=data.index, columns=labels)
+
+    return results
+
+def get_pair_frame(results, pair_info):
+    """
+    Extracts one pair from portfolio results in the same layout as
+    run_backtest, so it can be passed to calculate_performance_metrics
+    and plot_performance.
+
+    Args:
+        results (dict): Output of run_portfolio_backtest.
+        pair_info (tuple): The pair tuple, or its pair_label.
+
+    Returns:
+        pd.DataFrame: The per-pair backtest frame.
+    """
+    label = pair_info if isinstance(pair_info, str) else pair_label(pair_info)
+    return pd.DataFrame({column: results[column][label] for column in PAIR_COLUMNS})
@@ -0,0 +1,259 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+import uuid
+
+PRICES_FILE = 'prices.npy'
+DATES_FILE = 'dates.npy'
+META_FILE = 'meta.json'
+
+def is_csv_path(path):
+    """
+    Returns True if `path` refers to a legacy CSV price file rather than a price store.
+    """
+    return str(path).lower().endswith('.csv')
+
+def store_exists(path):
+    """
+    Returns True if a complete price store (or legacy CSV file) exists at `path`.
+    """
+    if is_csv_path(path):
+        return os.path.exists(path)
+    return os.path.exists(os.path.join(path, META_FILE))
+
+def save_prices(prices, path, dtype='float64', coverage=None):
+    """
+    Saves a DataFrame of prices. A path ending in '.csv' is written as CSV;
+    any other path is written as a binary price store directory holding a
+    column-major price matrix, the date index and a small metadata file.
+
+    Args:
+        prices (pd.DataFrame): Prices indexed by date, one column per ticker.
+        path (str): Destination CSV file or store directory.
+        dtype (str): 'float64' or 'float32' storage precision for the store.
+        coverage (dict, optional): Ticker -> list of [start, end) date ranges
+            already downloaded, kept in the store metadata.
+    """
+    if is_csv_path(path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        prices.to_csv(path)
+        return
+
+    if dtype not in ('float64', 'float32'):
+        raise ValueError("dtype must be 'float64' or 'float32'.")
+
+    os.makedirs(path, exist_ok=True)
+
+    # Write the arrays under new names and publish them by atomically
+    # replacing meta.json, so a crash mid-write leaves the previous store
+    # readable and complete. Superseded arrays are removed afterwards.
+    version = uuid.uuid4().hex[:12]
+    prices_file = f"prices-{version}.npy"
+    dates_file = f"dates-{version}.npy"
+
+    matrix = np.asfortranarray(prices.to_numpy(dtype=dtype))
+    dates = pd.DatetimeIndex(prices.index).to_numpy(dtype='datetime64[ns]')
+    np.save(os.path.join(path, prices_file), matrix)
+    np.save(os.path.join(path, dates_file), dates)
+
+    meta = {
+        'tickers': [str(ticker) for ticker in prices.columns],
+        'index_name': prices.index.name or 'Date',
+        'dtype': dtype,
+        'prices_file': prices_file,
+        'dates_file': dates_file,
+        'coverage': coverage or {},
+    }
+    meta_path = os.path.join(path, META_FILE)
+    temp_meta_path = f"{meta_path}.{version}.tmp"
+    with open(temp_meta_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_meta_path, meta_path)
+
+    for name in os.listdir(path):
+        stale = name.endswith('.npy') and name.startswith(('prices', 'dates'))
+        if stale and name not in (prices_file, dates_file):
+            try:
+                os.remove(os.path.join(path, name))
+            except OSError:
+                # Still memory-mapped elsewhere (Windows); removed on a later save.
+                pass
+
+def read_store_meta(path):
+    """
+    Reads the metadata (tickers, index name, dtype, coverage) of a price store.
+    """
+    with open(os.path.join(path, META_FILE)) as f:
+        return json.load(f)
+
+def load_prices(path, tickers=None, start_date=None, end_date=None, min_coverage=None, dropna=None):
+    """
+    Loads prices from a CSV file or a binary price store. The store is
+    memory-mapped, so only the requested tickers and date slice are read
+    from disk.
+
+    Args:
+        path (str): Source CSV file or store directory.
+        tickers (list, optional): Tickers to load. Defaults to all.
+        start_date (str, optional): First date to load, inclusive.
+        end_date (str, optional): Last date to load, inclusive.
+        min_coverage (float, optional): Drop tickers whose share of non-missing
+            prices in the loaded slice is below this fraction.
+        dropna (str, optional): 'any' or 'all' to drop dates with missing prices
+            after the ticker filter. None keeps every date.
+
+    Returns:
+        pd.DataFrame: Prices indexed by date, one column per requested ticker.
+    """
+    if is_csv_path(path):
+        prices = pd.read_csv(path, index_col=0, parse_dates=True)
+        if tickers is not None:
+            prices = prices[list(tickers)]
+        return _clean_prices(prices.loc[start_date:end_date], min_coverage, dropna)
+
+    meta = read_store_meta(path)
+    matrix = np.load(os.path.join(path, meta.get('prices_file', PRICES_FILE)), mmap_mode='r')
+    dates = np.load(os.path.join(path, meta.get('dates_file', DATES_FILE)), mmap_mode='r')
+
+    first = 0 if start_date is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(start_date)), side='left')
+    last = len(dates) if end_date is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(end_date)), side='right')
+
+    all_tickers = meta['tickers']
+    if tickers is None:
+        tickers = all_tickers
+    column_index = {ticker: i for i, ticker in enumerate(all_tickers)}
+    missing = [ticker for ticker in tickers if ticker not in column_index]
+    if missing:
+        raise KeyError(f"Tickers not in price store: {missing}")
+    columns = [column_index[ticker] for ticker in tickers]
+
+    values = np.column_stack([matrix[first:last, i] for i in columns]) if columns else np.empty((last - first, 0))
+    index = pd.DatetimeIndex(np.array(dates[first:last]), name=meta['index_name'])
+
+    prices = pd.DataFrame(values, index=index, columns=list(tickers))
+    return _clean_prices(prices, min_coverage, dropna)
+
+def _clean_prices(prices, min_coverage, dropna):
+    """
+    Applies the load-time NaN policy: first drop sparse tickers, then dates.
+    """
+    if min_coverage is not None and len(prices) > 0:
+        coverage = prices.notna().mean()
+        sparse = coverage.index[coverage < min_coverage]
+        if len(sparse) > 0:
+            print(f"Dropping {len(sparse)} ticker(s) below {min_coverage:.0%} coverage: {list(sparse)}")
+            prices = prices.drop(columns=sparse)
+    if dropna is not None:
+        prices = prices.dropna(axis=0, how=dropna)
+    return prices
+
+def import_csv(csv_path, store_path, dtype='float64', start_date=None, end_date=None):
+    """
+    One-time import of a legacy CSV price file into a binary price store.
+
+    Args:
+        csv_path (str): The CSV file written by earlier versions of fetch_data.
+        store_path (str): Destination store directory.
+        dtype (str): 'float64' or 'float32' storage precision.
+        start_date (str, optional): Start of the range the CSV was downloaded
+            for; earlier rows are dropped.
+        end_date (str, optional): Drop CSV rows after this date.
+
+    Returns:
+        pd.DataFrame: The imported prices.
+    """
+    print(f"Importing '{csv_path}' into price store '{store_path}'...")
+    prices = load_prices(csv_path, start_date=start_date, end_date=end_date)
+
+    # Cover from the requested start (the CSV was downloaded for it) up to the
+    # CSV's last bar, so update_data fetches any trailing gap.
+    first = prices.index[0] if start_date is None else pd.Timestamp(start_date)
+    last = prices.index[-1] + pd.Timedelta(days=1)
+    coverage = {str(ticker): [[first.isoformat(), last.isoformat()]] for ticker in prices.columns}
+
+    save_prices(prices, store_path, dtype=dtype, coverage=coverage)
+    return prices
+
+def add_coverage(ranges, start_date, end_date):
+    """
+    Adds a [start, end) date range to a list of ranges, merging overlaps.
+
+    Args:
+        ranges (list): Existing [start, end) ranges as ISO date strings.
+        start_date (str or pd.Timestamp): Start of the new range.
+        end_date (str or pd.Timestamp): Exclusive end of the new range.
+
+    Returns:
+        list: The sorted, merged ranges as ISO date strings.
+    """
+    intervals = sorted(
+        [(pd.Timestamp(s), pd.Timestamp(e)) for s, e in ranges] +
+        [(pd.Timestamp(start_date), pd.Timestamp(end_date))]
+    )
+    merged = [list(intervals[0])]
+    for s, e in intervals[1:]:
+        if s <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], e)
+        else:
+            merged.append([s, e])
+    return [[s.isoformat(), e.isoformat()] for s, e in merged]
+
+def missing_ranges(ranges, start_date, end_date):
+    """
+    Returns the parts of [start_date, end_date) not covered by `ranges`.
+
+    Args:
+        ranges (list): Covered [start, end) ranges as ISO date strings.
+        start_date (str or pd.Timestamp): Start of the requested range.
+        end_date (str or pd.Timestamp): Exclusive end of the requested range.
+
+    Returns:
+        list: Uncovered (start, end) pd.Timestamp tuples, in date order.
+    """
+    cursor = pd.Timestamp(start_date)
+    end = pd.Timestamp(end_date)
+    gaps = []
+
+    for s, e in sorted((pd.Timestamp(s), pd.Timestamp(e)) for s, e in ranges):
+        if cursor >= end:
+            break
+        if e <= cursor:
+            continue
+        if s > cursor:
+            gaps.append((cursor, min(s, end)))
+        cursor = max(cursor, e)
+
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+def merge_prices(path, new_prices, coverage, dtype='float64'):
+    """
+    Merges newly downloaded prices into a price store, creating it if needed.
+    Dates and tickers are outer-joined; new values win where both exist.
+
+    Args:
+        path (str): Store directory.
+        new_prices (pd.DataFrame): Prices indexed by date, one column per ticker.
+        coverage (dict): Updated ticker -> [start, end) ranges to record.
+        dtype (str): Storage precision used if the store is created.
+
+    Returns:
+        pd.DataFrame: The full merged price matrix.
+    """
+    if store_exists(path):
+        dtype = read_store_meta(path)['dtype']
+        prices = load_prices(path)
+        if new_prices is not None and not new_prices.empty:
+            prices = new_prices.combine_first(prices)
+    else:
+        prices = new_prices if new_prices is not None else pd.DataFrame()
+
+    prices = prices.sort_index()
+    prices = prices[sorted(prices.columns)]
+    prices.index.name = prices.index.name or 'Date'
+    save_prices(prices, path, dtype=dtype, coverage=coverage)
+    return prices
@@ -0,0 +1,278 @@
+import pandas as pd
+import numpy as np
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import time
+
+# Bump when screening or backtest results change for the same inputs, so
+# stale cache entries are never returned.
+CACHE_VERSION = 1
+
+class ResultCache:
+    """
+    Disk-backed key/value cache stored in a single SQLite file, with
+    least-recently-used eviction once the stored values exceed `max_bytes`.
+    """
+
+    def __init__(self, path, max_bytes=512 * 1024 * 1024):
+        """
+        Args:
+            path (str): Path of the SQLite cache file. Parent directories are created.
+            max_bytes (int): Upper bound on the total size of the stored values.
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value BLOB, size INTEGER, last_used REAL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS results_lru ON results (last_used)")
+        self.connection.commit()
+
+    def get_many(self, keys, chunk_size=500):
+        """
+        Looks up many keys at once and marks the hits as recently used.
+
+        Args:
+            keys (list): Cache keys.
+            chunk_size (int): Keys per SQL query.
+
+        Returns:
+            dict: key -> value for every key found in the cache.
+        """
+        found = {}
+        now = time.time()
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.connection.execute(
+                f"SELECT key, value FROM results WHERE key IN ({placeholders})", chunk
+            ).fetchall()
+            for key, value in rows:
+                found[key] = pickle.loads(value)
+            if rows:
+                hit_keys = [key for key, _ in rows]
+                self.connection.execute(
+                    f"UPDATE results SET last_used = ? WHERE key IN ({','.join('?' * len(hit_keys))})",
+                    [now] + hit_keys
+                )
+        self.connection.commit()
+        return found
+
+    def put_many(self, items):
+        """
+        Stores many key/value pairs, then evicts least-recently-used entries
+        if the cache has grown past `max_bytes`.
+
+        Args:
+            items (dict): key -> picklable value.
+        """
+        now = time.time()
+        rows = []
+        for key, value in items.items():
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            rows.append((key, blob, len(blob), now))
+        self.connection.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", rows)
+        self.connection.commit()
+        self._evict()
+
+    def get(self, key, default=None):
+        """
+        Returns the cached value for `key`, or `default` if it is not cached.
+        """
+        return self.get_many([key]).get(key, default)
+
+    def put(self, key, value):
+        """
+        Stores a single value under `key`.
+        """
+        self.put_many({key: value})
+
+    def _evict(self):
+        """
+        Deletes the least recently used entries until the cache fits in `max_bytes`.
+        """
+        total = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evict = []
+        for key, size in self.connection.execute("SELECT key, size FROM results ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            evict.append((key,))
+            total -= size
+        self.connection.executemany("DELETE FROM results WHERE key = ?", evict)
+        self.connection.commit()
+
+    def clear(self):
+        """
+        Removes every entry from the cache.
+        """
+        self.connection.execute("DELETE FROM results")
+        self.connection.commit()
+
+    def close(self):
+        """
+        Closes the underlying database connection.
+        """
+        self.connection.close()
+
+def hash_index(index):
+    """
+    Returns a content hash of a date index, identifying the date range and sampling.
+    """
+    values = pd.DatetimeIndex(index).to_numpy(dtype='datetime64[ns]').view(np.int64)
+    return hashlib.sha1(np.ascontiguousarray(values).tobytes()).hexdigest()
+
+def hash_columns(data):
+    """
+    Returns a content hash for every price column of a DataFrame.
+
+    Args:
+        data (pd.DataFrame): DataFrame with stock prices, where columns are tickers.
+
+    Returns:
+        dict: ticker -> hex digest of the column's values.
+    """
+    values = data.to_numpy(dtype=np.float64)
+    return {
+        ticker: hashlib.sha1(np.ascontiguousarray(values[:, i]).tobytes()).hexdigest()
+        for i, ticker in enumerate(data.columns)
+    }
+
+def make_key(*parts):
+    """
+    Builds a cache key from JSON-serializable parts and the cache version.
+    """
+    payload = json.dumps([CACHE_VERSION] + list(parts), sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+def cached_screen_pairs(data, cache, pairs, screen_function, **screen_kwargs):
+    """
+    Runs a pair screen through the cache. Each pair is cached on its own,
+    keyed by the content hashes of its two price columns, the date index and
+    the screen parameters, so only pairs that have not been seen before are
+    passed to `screen_function`.
+
+    Args:
+        data (pd.DataFrame): DataFrame with stock prices, where columns are tickers.
+        cache (ResultCache): The result cache.
+        pairs (list): Pairs of tickers to test.
+        screen_function (callable): screen_function(data, pairs, **screen_kwargs)
+            returning (ticker1, ticker2, p_value, hedge_ratio) tuples in order.
+        **screen_kwargs: Screen parameters that affect the results.
+
+    Returns:
+        list: A tuple (ticker1, ticker2, p_value, hedge_ratio) for every pair,
+              in the order the pairs were given.
+    """
+    index_hash = hash_index(data.index)
+    column_hashes = hash_columns(data)
+    params = {key: value for key, value in screen_kwargs.items()
+              if key not in ('block_size', 'workers', 'instrumentation')}
+
+    keys = [
+        make_key('pair', column_hashes[t1], column_hashes[t2], index_hash, params)
+        for t1, t2 in pairs
+    ]
+    found = cache.get_many(keys)
+
+    missing = [pair for pair, key in zip(pairs, keys) if key not in found]
+    missing_keys = [key for key in keys if key not in found]
+    print(f"Result cache: {len(pairs) - len(missing)} of {len(pairs)} pairs cached, "
+          f"testing {len(missing)}.")
+
+    instrumentation = screen_kwargs.get('instrumentation')
+    if instrumentation is not None and len(missing) < len(pairs):
+        instrumentation.annotate(
+            'screen_blocks', f"{len(pairs) - len(missing)} of {len(pairs)} pairs came from the "
+            "result cache and have no screen timings.")
+
+    if missing:
+        screened = screen_function(data, missing, **screen_kwargs)
+        new_items = {
+            key: (p_value, hedge_ratio)
+            for key, (_, _, p_value, hedge_ratio) in zip(missing_keys, screened)
+        }
+        cache.put_many(new_items)
+        found.update(new_items)
+
+    return [(t1, t2) + tuple(found[key]) for (t1, t2), key in zip(pairs, keys)]
+
+def _hash_value(value):
+    """
+    Returns a JSON-friendly cache-key part for a scalar or an array-like value.
+    """
+    if value is None:
+        return None
+    if np.ndim(value) > 0:
+        return hashlib.sha1(np.ascontiguousarray(value, dtype=np.float64).tobytes()).hexdigest()
+    return repr(float(value)) if isinstance(value, (float, np.floating)) else value
+
+def cached_run_backtest(data, pair_info, cache, backtest_function, **backtest_kwargs):
+    """
+    Runs a single-pair backtest through the cache, keyed by the content of
+    the pair's two price columns, the date index, the hedge ratio and all
+    backtest parameters.
+
+    Args:
+        data (pd.DataFrame): DataFrame with historical price data.
+        pair_info (tuple): Tuple containing pair tickers, p-value, and hedge ratio.
+        cache (ResultCache): The result cache.
+        backtest_function (callable): Usually backtester.run_backtest.
+        **backtest_kwargs: Arguments passed on to `backtest_function`.
+
+    Returns:
+        pd.DataFrame: The backtest frame.
+    """
+    stock1_ticker, stock2_ticker, _, hedge_ratio = pair_info
+    column_hashes = hash_columns(data[[stock1_ticker, stock2_ticker]])
+    params = {key: _hash_value(value) for key, value in backtest_kwargs.items()}
+
+    key = make_key('backtest', stock1_ticker, stock2_ticker, column_hashes[stock1_ticker],
+                   column_hashes[stock2_ticker], hash_index(data.index), _hash_value(hedge_ratio), params)
+    result = cache.get(key)
+    if result is None:
+        result = backtest_function(data, pair_info, **backtest_kwargs)
+        cache.put(key, result)
+    return result
+
+def cached_run_portfolio_backtest(data, pairs, cache, backtest_function, **backtest_kwargs):
+    """
+    Runs a portfolio backtest through the cache, keyed like
+    cached_run_backtest by every pair's tickers, price columns and hedge
+    ratio, the date index and all backtest parameters (weights included).
+
+    Args:
+        data (pd.DataFrame): DataFrame with historical price data.
+        pairs (list): Pair tuples as returned by find_cointegrated_pairs.
+        cache (ResultCache): The result cache.
+        backtest_function (callable): Usually portfolio.run_portfolio_backtest.
+        **backtest_kwargs: Arguments passed on to `backtest_function`.
+
+    Returns:
+        dict: The portfolio backtest results.
+    """
+    tickers = sorted({ticker for pair_info in pairs for ticker in pair_info[:2]})
+    column_hashes = hash_columns(data[tickers])
+    pair_keys = [
+        [stock1_ticker, stock2_ticker, column_hashes[stock1_ticker], column_hashes[stock2_ticker],
+         _hash_value(hedge_ratio)]
+        for stock1_ticker, stock2_ticker, _, hedge_ratio in pairs
+    ]
+    params = {key: _hash_value(value) for key, value in backtest_kwargs.items()}
+
+    key = make_key('portfolio_backtest', pair_keys, hash_index(data.index), params)
+    result = cache.get(key)
+    if result is None:
+        result = backtest_function(data, pairs, **backtest_kwargs)
+        cache.put(key, result)
+    else:
+        print(f"Result cache: portfolio backtest for {len(pairs)} pair(s) loaded from cache.")
+    return result
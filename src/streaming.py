@@ -0,0 +1,169 @@
+import pandas as pd
+import numpy as np
+
+from src.backtester import step_positions
+from src.portfolio import pair_label
+
+class StreamingSignalEngine:
+    """
+    Online version of the run_backtest signal logic for a set of pairs.
+
+    Each pair keeps a ring buffer of its last `window` spreads together with a
+    running sum and sum of squares, so a new bar updates the rolling mean,
+    standard deviation, z-score and position in constant time. All pairs are
+    advanced together in one vectorized step.
+
+    The sums are taken relative to a per-pair anchor and rebuilt from the
+    buffer every `resync_interval` bars, which bounds floating-point drift at
+    an amortized O(1) cost.
+    """
+
+    def __init__(self, pairs, window=30, entry_threshold=2.0, exit_threshold=0.5,
+                 stop_loss_threshold=3.0, resync_interval=None):
+        """
+        Args:
+            pairs (list): Pair tuples as returned by find_cointegrated_pairs.
+            window (int): Rolling window for the spread mean and standard deviation.
+            entry_threshold (float): |z| above which a new position is opened.
+            exit_threshold (float): |z| below which an open position is closed.
+            stop_loss_threshold (float): |z| above which an open position is stopped out.
+            resync_interval (int, optional): Bars between exact recomputations of
+                the running sums. Defaults to `window`.
+        """
+        if window < 2:
+            raise ValueError("window must be at least 2.")
+
+        self.pairs = list(pairs)
+        self.labels = [pair_label(pair_info) for pair_info in self.pairs]
+        self.hedge_ratios = np.array([pair_info[3] for pair_info in self.pairs], dtype=np.float64)
+        self.window = window
+        self.entry_threshold = entry_threshold
+        self.exit_threshold = exit_threshold
+        self.stop_loss_threshold = stop_loss_threshold
+        self.resync_interval = resync_interval or window
+        self.reset()
+
+    def reset(self):
+        """
+        Clears all per-pair state, as if no bars had been seen.
+        """
+        n_pairs = len(self.pairs)
+        self.buffer = np.full((self.window, n_pairs), np.nan)
+        self.head = 0
+        self.n_bars = 0
+        self.anchor = np.full(n_pairs, np.nan)
+        self.sums = np.zeros(n_pairs)
+        self.squares = np.zeros(n_pairs)
+        self.nan_count = np.full(n_pairs, self.window)
+        self.position = np.zeros(n_pairs, dtype=np.int64)
+
+    def _resync(self):
+        """
+        Recomputes the running sums exactly from the ring buffer, re-anchoring
+        each pair on its current window mean.
+        """
+        valid = ~np.isnan(self.buffer)
+        counts = valid.sum(axis=0)
+        with np.errstate(invalid='ignore'):
+            means = np.where(valid, self.buffer, 0.0).sum(axis=0) / counts
+        self.anchor = np.where(counts > 0, means, self.anchor)
+
+        centered = np.where(valid, self.buffer - self.anchor, 0.0)
+        self.sums = centered.sum(axis=0)
+        self.squares = (centered ** 2).sum(axis=0)
+        self.nan_count = self.window - counts
+
+    def update_arrays(self, s1_prices, s2_prices):
+        """
+        Feeds one bar of prices for every pair.
+
+        Args:
+            s1_prices (np.ndarray): Latest price of the first stock of each pair.
+            s2_prices (np.ndarray): Latest price of the second stock of each pair.
+
+        Returns:
+            tuple: (spread, z_score, position) arrays, one entry per pair. The
+                   position is the one to hold over the next bar, i.e. the
+                   value run_backtest assigns to the following row.
+        """
+        spread = np.asarray(s2_prices, dtype=np.float64) - self.hedge_ratios * np.asarray(s1_prices, dtype=np.float64)
+
+        first = np.isnan(self.anchor) & ~np.isnan(spread)
+        self.anchor[first] = spread[first]
+
+        old = self.buffer[self.head]
+        old_valid = ~np.isnan(old)
+        new_valid = ~np.isnan(spread)
+        old_centered = np.where(old_valid, old - self.anchor, 0.0)
+        new_centered = np.where(new_valid, spread - self.anchor, 0.0)
+
+        self.sums += new_centered - old_centered
+        self.squares += new_centered ** 2 - old_centered ** 2
+        self.nan_count += old_valid.astype(np.int64) - new_valid.astype(np.int64)
+
+        self.buffer[self.head] = spread
+        self.head = (self.head + 1) % self.window
+        self.n_bars += 1
+
+        if self.n_bars % self.resync_interval == 0:
+            self._resync()
+
+        mean = self.sums / self.window
+        variance = np.maximum(self.squares - self.sums * mean, 0.0) / (self.window - 1)
+        ready = (self.nan_count == 0) & (self.n_bars >= self.window)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z_score = np.where(ready, (spread - self.anchor - mean) / np.sqrt(variance), np.nan)
+
+        self.position = step_positions(self.position, z_score, self.entry_threshold,
+                                       self.exit_threshold, self.stop_loss_threshold)
+
+        return spread, z_score, self.position.copy()
+
+    def update(self, prices):
+        """
+        Feeds one bar given as a mapping of ticker -> latest price.
+
+        Args:
+            prices (dict or pd.Series): Latest prices, covering every pair's tickers.
+
+        Returns:
+            tuple: (spread, z_score, position) arrays, one entry per pair.
+        """
+        s1_prices = np.array([prices[pair_info[0]] for pair_info in self.pairs], dtype=np.float64)
+        s2_prices = np.array([prices[pair_info[1]] for pair_info in self.pairs], dtype=np.float64)
+        return self.update_arrays(s1_prices, s2_prices)
+
+def replay_signals(data, pairs, **engine_kwargs):
+    """
+    Replays a price history through a StreamingSignalEngine, bar by bar.
+
+    Args:
+        data (pd.DataFrame): DataFrame with historical price data.
+        pairs (list): Pair tuples as returned by find_cointegrated_pairs.
+        **engine_kwargs: Window and threshold arguments for the engine.
+
+    Returns:
+        dict: 'spread', 'z_score' and 'position' time x pair DataFrames laid
+              out like run_backtest's columns, with each position shifted to
+              the bar it is held on.
+    """
+    engine = StreamingSignalEngine(pairs, **engine_kwargs)
+    s1_prices = data[[pair_info[0] for pair_info in pairs]].to_numpy(dtype=np.float64)
+    s2_prices = data[[pair_info[1] for pair_info in pairs]].to_numpy(dtype=np.float64)
+
+    n_bars = len(data)
+    spread = np.empty((n_bars, len(pairs)))
+    z_score = np.empty((n_bars, len(pairs)))
+    position = np.zeros((n_bars, len(pairs)), dtype=np.int64)
+
+    for i in range(n_bars):
+        spread[i], z_score[i], next_position = engine.update_arrays(s1_prices[i], s2_prices[i])
+        if i + 1 < n_bars:
+            position[i + 1] = next_position
+
+    return {
+        'spread': pd.DataFrame(spread, index=data.index, columns=engine.labels),
+        'z_score': pd.DataFrame(z_score, index=data.index, columns=engine.labels),
+        'position': pd.DataFrame(position, index=data.index, columns=engine.labels),
+    }
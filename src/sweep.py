@@ -0,0 +1,146 @@
+import pandas as pd
+import numpy as np
+from itertools import product
+
+from src.backtester import compute_positions_matrix
+from src.portfolio import pair_label
+
+def rolling_moments(values, window):
+    """
+    Computes rolling means and sample standard deviations for every column
+    from cumulative sums, so each window costs O(n) regardless of its length.
+    Columns are centred before summing to limit cancellation error.
+
+    Args:
+        values (np.ndarray): 2-D array with shape (n_obs, n_series). Must not contain NaN.
+        window (int): Rolling window length.
+
+    Returns:
+        tuple: (moving_avg, moving_std) arrays shaped like `values`, with NaN
+               for the first window - 1 rows, as in pandas' rolling().
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if np.isnan(values).any():
+        raise ValueError("rolling_moments does not support NaN values.")
+    if window < 2:
+        raise ValueError("window must be at least 2.")
+
+    center = values.mean(axis=0)
+    centered = values - center
+    zeros = np.zeros((1, values.shape[1]))
+    sums = np.concatenate([zeros, np.cumsum(centered, axis=0)])
+    squares = np.concatenate([zeros, np.cumsum(centered ** 2, axis=0)])
+
+    window_sums = sums[window:] - sums[:-window]
+    window_squares = squares[window:] - squares[:-window]
+    variance = np.maximum(window_squares - window_sums ** 2 / window, 0.0) / (window - 1)
+
+    moving_avg = np.full(values.shape, np.nan)
+    moving_std = np.full(values.shape, np.nan)
+    moving_avg[window - 1:] = window_sums / window + center
+    moving_std[window - 1:] = np.sqrt(variance)
+
+    return moving_avg, moving_std
+
+def _sweep_metrics(strategy_returns, positions, days):
+    """
+    Numeric versions of calculate_performance_metrics, computed for every
+    column of a (time x configuration) returns matrix at once.
+    """
+    cumulative_returns = np.cumprod(1 + strategy_returns, axis=0)
+    total_return = cumulative_returns[-1] - 1
+    annualized_return = (1 + total_return) ** (365.0 / days) - 1
+    annualized_volatility = strategy_returns.std(axis=0, ddof=1) * np.sqrt(252)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe_ratio = np.where(annualized_volatility != 0, annualized_return / annualized_volatility, 0.0)
+
+    running_max = np.maximum.accumulate(cumulative_returns, axis=0)
+    max_drawdown = ((cumulative_returns - running_max) / running_max).min(axis=0)
+    n_trades = ((positions[1:] != 0) & (positions[:-1] == 0)).sum(axis=0)
+
+    return {
+        'total_return': total_return,
+        'annualized_return': annualized_return,
+        'annualized_volatility': annualized_volatility,
+        'sharpe_ratio': sharpe_ratio,
+        'max_drawdown': max_drawdown,
+        'n_trades': n_trades,
+    }
+
+def run_parameter_sweep(data, pairs, windows, entry_thresholds, exit_thresholds,
+                        stop_loss_thresholds, chunk_size=256):
+    """
+    Backtests every combination of rolling window and entry/exit/stop-loss
+    thresholds for one or more pairs. Rolling statistics are computed once
+    per window and shared by all threshold combinations, and the position
+    state machine runs over all pairs and combinations in the same step.
+
+    Args:
+        data (pd.DataFrame): DataFrame with historical price data.
+        pairs (list or tuple): One pair tuple, or a list or tuple of pair tuples as
+            returned by find_cointegrated_pairs.
+        windows (list): Rolling window lengths to test.
+        entry_thresholds (list): Entry z-score thresholds to test.
+        exit_thresholds (list): Exit z-score thresholds to test.
+        stop_loss_thresholds (list): Stop-loss z-score thresholds to test.
+        chunk_size (int): Threshold combinations simulated together, bounding memory.
+
+    Returns:
+        pd.DataFrame: One row per (pair, window, thresholds) combination with
+                      numeric performance metrics.
+    """
+    # A single pair tuple starts with a ticker; a collection of pairs starts with a pair.
+    if len(pairs) > 0 and isinstance(pairs[0], str):
+        pairs = [pairs]
+    pairs = list(pairs)
+
+    combos = np.array(list(product(entry_thresholds, exit_thresholds, stop_loss_thresholds)), dtype=np.float64)
+    n_pairs = len(pairs)
+
+    print(f"Sweeping {len(windows)} window(s) x {len(combos)} threshold combination(s) "
+          f"for {n_pairs} pair(s)...")
+
+    hedge_ratios = np.array([pair_info[3] for pair_info in pairs], dtype=np.float64)
+    s1_prices = data[[pair_info[0] for pair_info in pairs]].to_numpy(dtype=np.float64)
+    s2_prices = data[[pair_info[1] for pair_info in pairs]].to_numpy(dtype=np.float64)
+    spread = s2_prices - hedge_ratios * s1_prices
+
+    leg_returns = np.zeros(spread.shape)
+    leg_returns[1:] = hedge_ratios * (s1_prices[1:] / s1_prices[:-1] - 1) - (s2_prices[1:] / s2_prices[:-1] - 1)
+    days = (data.index[-1] - data.index[0]).days
+
+    labels = [pair_label(pair_info) for pair_info in pairs]
+    frames = []
+
+    for window in windows:
+        moving_avg, moving_std = rolling_moments(spread, window)
+        z_score = (spread - moving_avg) / moving_std
+
+        for start in range(0, len(combos), chunk_size):
+            chunk = combos[start:start + chunk_size]
+            n_combos = len(chunk)
+
+            # Columns are laid out combination-major: [combo0 pairs, combo1 pairs, ...].
+            positions = compute_positions_matrix(
+                np.tile(z_score, (1, n_combos)),
+                np.repeat(chunk[:, 0], n_pairs),
+                np.repeat(chunk[:, 1], n_pairs),
+                np.repeat(chunk[:, 2], n_pairs),
+            )
+            strategy_returns = np.zeros(positions.shape)
+            strategy_returns[1:] = positions[:-1] * np.tile(leg_returns[1:], (1, n_combos))
+            strategy_returns = np.nan_to_num(strategy_returns, nan=0.0)
+
+            metrics = _sweep_metrics(strategy_returns, positions, days)
+            frame = pd.DataFrame({
+                'pair': np.tile(labels, n_combos),
+                'window': window,
+                'entry_threshold': np.repeat(chunk[:, 0], n_pairs),
+                'exit_threshold': np.repeat(chunk[:, 1], n_pairs),
+                'stop_loss_threshold': np.repeat(chunk[:, 2], n_pairs),
+                **metrics,
+            })
+            frames.append(frame)
+
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,62 @@
+import pandas as pd
+import numpy as np
+
+def generate_cointegrated_universe(n_tickers, n_obs, n_pairs=0, freq='B', start_date="2020-01-01",
+                                   ar_coefficient=0.9, noise_scale=1.0, seed=None):
+    """
+    Generates a synthetic price panel of independent random walks with a
+    planted set of cointegrated pairs.
+
+    Each planted pair is built as s2 = intercept + hedge_ratio * s1 + u, where
+    s1 is one of the random walks and u is a stationary AR(1) process, so the
+    pair is cointegrated in price levels exactly as find_cointegrated_pairs
+    tests for. All other tickers are independent geometric random walks.
+
+    Args:
+        n_tickers (int): Total number of tickers in the panel.
+        n_obs (int): Number of bars.
+        n_pairs (int): Number of planted cointegrated pairs (uses 2 tickers each).
+        freq (str): Pandas frequency of the date index, e.g. 'B' for daily or 'min'.
+        start_date (str): First timestamp of the index.
+        ar_coefficient (float): AR(1) coefficient of the pair residual; below 1 is stationary.
+        noise_scale (float): Standard deviation of the residual innovations.
+        seed (int, optional): Seed for reproducible panels.
+
+    Returns:
+        tuple: (prices, planted_pairs) where prices is a DataFrame indexed by
+               date with columns 'SYN0000', 'SYN0001', ... and planted_pairs is a
+               list of (ticker1, ticker2, hedge_ratio) tuples.
+    """
+    if 2 * n_pairs > n_tickers:
+        raise ValueError("n_pairs needs two tickers per pair.")
+
+    rng = np.random.default_rng(seed)
+    tickers = [f"SYN{i:04d}" for i in range(n_tickers)]
+
+    volatility = rng.uniform(0.01, 0.03, n_tickers)
+    log_returns = rng.normal(0.0, 1.0, (n_obs, n_tickers)) * volatility
+    start_prices = rng.uniform(20.0, 200.0, n_tickers)
+    prices = start_prices * np.exp(np.cumsum(log_returns, axis=0))
+
+    hedge_ratios = rng.uniform(0.5, 2.0, n_pairs)
+    innovations = rng.normal(0.0, noise_scale, (n_obs, n_pairs))
+    residuals = np.empty((n_obs, n_pairs))
+    if n_obs > 0:
+        residuals[0] = innovations[0]
+    for t in range(1, n_obs):
+        residuals[t] = ar_coefficient * residuals[t-1] + innovations[t]
+
+    planted_pairs = []
+    for k in range(n_pairs):
+        i, j = 2 * k, 2 * k + 1
+        dependent = hedge_ratios[k] * prices[:, i] + residuals[:, k]
+        # Shift the dependent leg so its prices stay positive.
+        prices[:, j] = dependent - dependent.min() + rng.uniform(10.0, 50.0)
+        planted_pairs.append((tickers[i], tickers[j], float(hedge_ratios[k])))
+
+    # Shuffle columns so planted pairs are not adjacent in the panel.
+    order = rng.permutation(n_tickers)
+    index = pd.date_range(start=start_date, periods=n_obs, freq=freq, name='Date')
+    panel = pd.DataFrame(prices[:, order], index=index, columns=[tickers[i] for i in order])
+
+    return panel, planted_pairs
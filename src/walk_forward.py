@@ -0,0 +1,158 @@
+import pandas as pd
+import numpy as np
+
+from src.backtester import run_backtest
+from src.batch_adf import batch_adfuller
+from src.portfolio import pair_label
+
+def recursive_hedge_ratios(data, pairs, forgetting=1.0, window=None, min_periods=30):
+    """
+    Estimates a time-varying OLS hedge ratio (with intercept) for each pair
+    using only data up to each bar. The regression moments are updated
+    recursively, so each bar costs O(1) per pair:
+
+    - with `forgetting` = 1 the estimate is the expanding-window OLS fit;
+    - with `forgetting` < 1 older bars are down-weighted exponentially,
+      which is recursive least squares with a forgetting factor;
+    - with `window` set the estimate is a rolling-window OLS fit.
+
+    Args:
+        data (pd.DataFrame): DataFrame with historical price data.
+        pairs (list): Pair tuples as returned by find_cointegrated_pairs.
+        forgetting (float): Forgetting factor in (0, 1].
+        window (int, optional): Rolling window length. Cannot be combined with forgetting < 1.
+        min_periods (int): Bars required before a hedge ratio is reported.
+
+    Returns:
+        pd.DataFrame: Hedge ratio per bar (rows) and pair (columns labelled by
+                      pair_label). NaN until `min_periods` bars are available.
+    """
+    if not 0 < forgetting <= 1:
+        raise ValueError("forgetting must be in (0, 1].")
+    if window is not None and forgetting != 1.0:
+        raise ValueError("Use either a rolling window or a forgetting factor, not both.")
+
+    x = data[[pair_info[0] for pair_info in pairs]].to_numpy(dtype=np.float64)
+    y = data[[pair_info[1] for pair_info in pairs]].to_numpy(dtype=np.float64)
+    # Shift by the first observation so the moment sums stay well conditioned;
+    # the slope is invariant to the shift and the first bar is always known.
+    x = x - x[0]
+    y = y - y[0]
+
+    if window is None:
+        weight, sx, sy, sxx, sxy = (np.zeros(x.shape[1]) for _ in range(5))
+        slopes = np.empty(x.shape)
+        for i in range(len(x)):
+            weight = forgetting * weight + 1
+            sx = forgetting * sx + x[i]
+            sy = forgetting * sy + y[i]
+            sxx = forgetting * sxx + x[i] * x[i]
+            sxy = forgetting * sxy + x[i] * y[i]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                slopes[i] = (weight * sxy - sx * sy) / (weight * sxx - sx * sx)
+    else:
+        def rolling_sum(values):
+            sums = np.concatenate([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)])
+            totals = sums[1:].copy()
+            totals[window:] -= sums[1:-window]
+            return totals
+
+        counts = np.minimum(np.arange(1, len(x) + 1), window)[:, None]
+        sx, sy = rolling_sum(x), rolling_sum(y)
+        sxx, sxy = rolling_sum(x * x), rolling_sum(x * y)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slopes = (counts * sxy - sx * sy) / (counts * sxx - sx * sx)
+
+    slopes[:min_periods - 1] = np.nan
+    labels = [pair_label(pair_info) for pair_info in pairs]
+    return pd.DataFrame(slopes, index=data.index, columns=labels)
+
+def scheduled_cointegration(data, pairs, hedge_ratios, test_window=252, test_every=21,
+                            p_value_threshold=0.05, maxlag=None, autolag='AIC'):
+    """
+    Re-runs the cointegration test on a fixed schedule instead of every bar.
+    On each test date the ADF test is run on the trailing `test_window` bars
+    of the spread built with that date's hedge ratio; the result then holds
+    until the next test date. All tests are solved in one batched call.
+
+    Args:
+        data (pd.DataFrame): DataFrame with historical price data.
+        pairs (list): Pair tuples as returned by find_cointegrated_pairs.
+        hedge_ratios (pd.DataFrame): Output of recursive_hedge_ratios.
+        test_window (int): Number of trailing bars used by each test.
+        test_every (int): Bars between tests.
+        p_value_threshold (float): The significance level for the cointegration test.
+        maxlag (int, optional): Maximum ADF lag. Defaults to adfuller's rule.
+        autolag (str, optional): 'AIC', 'BIC', or None for a fixed maxlag.
+
+    Returns:
+        tuple: (p_values, tradable) DataFrames shaped like `hedge_ratios`. Bars
+               before the first test have NaN p-values and are not tradable.
+    """
+    labels = [pair_label(pair_info) for pair_info in pairs]
+    x = data[[pair_info[0] for pair_info in pairs]].to_numpy(dtype=np.float64)
+    y = data[[pair_info[1] for pair_info in pairs]].to_numpy(dtype=np.float64)
+    betas = hedge_ratios[labels].to_numpy()
+
+    test_bars = np.arange(test_window - 1, len(data), test_every)
+    p_values = np.full(x.shape, np.nan)
+
+    if len(test_bars) > 0:
+        spreads = np.concatenate([
+            y[bar - test_window + 1:bar + 1] - betas[bar] * x[bar - test_window + 1:bar + 1]
+            for bar in test_bars
+        ], axis=1)
+
+        # Tests whose hedge ratio is not available yet stay NaN.
+        finite = np.isfinite(spreads).all(axis=0)
+        tested = np.full(spreads.shape[1], np.nan)
+        if finite.any():
+            _, tested[finite], _ = batch_adfuller(spreads[:, finite], maxlag=maxlag, autolag=autolag)
+        p_values[test_bars] = tested.reshape(len(test_bars), len(pairs))
+
+    p_values = pd.DataFrame(p_values, index=data.index, columns=labels)
+    p_values.iloc[test_bars] = p_values.iloc[test_bars].fillna(1.0)
+    p_values = p_values.ffill()
+    tradable = p_values < p_value_threshold
+
+    return p_values, tradable
+
+def run_walk_forward_backtest(data, pair_info, forgetting=1.0, hedge_window=None, min_periods=30,
+                              test_window=252, test_every=21, p_value_threshold=0.05, maxlag=None,
+                              autolag='AIC', **backtest_kwargs):
+    """
+    Backtests a pair without look-ahead in the hedge ratio: the spread uses
+    the recursively estimated hedge ratio of each bar, and new positions are
+    only opened while the most recent scheduled cointegration test passes.
+
+    Args:
+        data (pd.DataFrame): DataFrame with historical price data.
+        pair_info (tuple): Tuple containing pair tickers, p-value, and hedge ratio.
+        forgetting (float): Forgetting factor for the hedge-ratio estimate.
+        hedge_window (int, optional): Rolling window for the hedge-ratio estimate.
+        min_periods (int): Bars required before a hedge ratio is reported.
+        test_window (int): Number of trailing bars used by each cointegration test.
+        test_every (int): Bars between cointegration tests.
+        p_value_threshold (float): The significance level for the cointegration test.
+        maxlag (int, optional): Maximum ADF lag. Defaults to adfuller's rule.
+        autolag (str, optional): 'AIC', 'BIC', or None for a fixed maxlag.
+        **backtest_kwargs: Window and threshold arguments for run_backtest.
+
+    Returns:
+        pd.DataFrame: The run_backtest frame plus 'hedge_ratio',
+                      'coint_p_value' and 'tradable' columns.
+    """
+    label = pair_label(pair_info)
+    hedge_ratios = recursive_hedge_ratios(data, [pair_info], forgetting=forgetting,
+                                          window=hedge_window, min_periods=min_periods)
+    p_values, tradable = scheduled_cointegration(data, [pair_info], hedge_ratios, test_window=test_window,
+                                                 test_every=test_every, p_value_threshold=p_value_threshold,
+                                                 maxlag=maxlag, autolag=autolag)
+
+    walk_forward_pair = (pair_info[0], pair_info[1], pair_info[2], hedge_ratios[label])
+    df = run_backtest(data, walk_forward_pair, entry_mask=tradable[label].to_numpy(), **backtest_kwargs)
+
+    df['hedge_ratio'] = hedge_ratios[label]
+    df['coint_p_value'] = p_values[label]
+    df['tradable'] = tradable[label]
+    return df
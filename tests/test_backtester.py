@@ -0,0 +1,84 @@
+import os
+from itertools import combinations
+
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from src.backtester import run_backtest
+from src.pair_finder import compute_hedge_ratios
+
+DATA_FILE_PATH = os.path.join(os.path.dirname(__file__), os.pardir, 'data', 'stock_prices.csv')
+
+def reference_backtest(data, pair_info):
+    """
+    The original per-bar .iloc/.loc backtest loop, kept as the reference
+    the array engine must reproduce.
+    """
+    stock1_ticker, stock2_ticker, _, hedge_ratio = pair_info
+
+    df = pd.DataFrame(index=data.index)
+    df['s1_price'] = data[stock1_ticker]
+    df['s2_price'] = data[stock2_ticker]
+
+    df['spread'] = df['s2_price'] - hedge_ratio * df['s1_price']
+
+    window = 30
+    df['moving_avg'] = df['spread'].rolling(window=window).mean()
+    df['moving_std'] = df['spread'].rolling(window=window).std()
+    df['z_score'] = (df['spread'] - df['moving_avg']) / df['moving_std']
+
+    entry_threshold = 2.0
+    exit_threshold = 0.5
+    stop_loss_threshold = 3.0
+
+    df['position'] = 0
+    in_position = False
+
+    for i in range(1, len(df)):
+        if not in_position and df['z_score'].iloc[i-1] > entry_threshold:
+            df.loc[df.index[i], 'position'] = -1
+            in_position = True
+        elif not in_position and df['z_score'].iloc[i-1] < -entry_threshold:
+            df.loc[df.index[i], 'position'] = 1
+            in_position = True
+        elif in_position:
+            current_pos = df['position'].iloc[i-1]
+            z_score = df['z_score'].iloc[i-1]
+
+            if current_pos == -1 and (z_score < exit_threshold or z_score > stop_loss_threshold):
+                in_position = False
+            elif current_pos == 1 and (z_score > -exit_threshold or z_score < -stop_loss_threshold):
+                in_position = False
+            else:
+                df.loc[df.index[i], 'position'] = current_pos
+
+    df['strategy_returns'] = (df['position'].shift(1) * (hedge_ratio * df['s1_price'].pct_change() - df['s2_price'].pct_change())).fillna(0)
+
+    df['cumulative_returns'] = (1 + df['strategy_returns']).cumprod()
+
+    return df
+
+def bundled_pairs():
+    """
+    Every pair of the bundled CSV with its OLS hedge ratio.
+    """
+    data = pd.read_csv(DATA_FILE_PATH, index_col=0, parse_dates=True).dropna()
+    pairs = list(combinations(data.columns, 2))
+    column_index = {ticker: i for i, ticker in enumerate(data.columns)}
+    hedge_ratios = compute_hedge_ratios(
+        data.to_numpy(dtype=float),
+        [column_index[t1] for t1, _ in pairs],
+        [column_index[t2] for _, t2 in pairs],
+    )
+    return data, [(t1, t2, None, float(h)) for (t1, t2), h in zip(pairs, hedge_ratios)]
+
+DATA, PAIRS = bundled_pairs()
+
+@pytest.mark.parametrize('pair_info', PAIRS, ids=[f"{t1}-{t2}" for t1, t2, _, _ in PAIRS])
+def test_run_backtest_matches_reference_loop(pair_info):
+    columns = ['position', 'strategy_returns', 'cumulative_returns']
+    expected = reference_backtest(DATA, pair_info)[columns]
+    result = run_backtest(DATA, pair_info)[columns]
+
+    assert_frame_equal(result, expected, check_dtype=False)
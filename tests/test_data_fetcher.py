@@ -0,0 +1,82 @@
+import os
+
+import pandas as pd
+
+from src import data_fetcher
+from src.data_fetcher import fetch_data, frame_downloader, update_data
+from src.price_store import import_csv, load_prices, read_store_meta
+
+DATA_FILE_PATH = os.path.join(os.path.dirname(__file__), os.pardir, 'data', 'stock_prices.csv')
+START_DATE = "2020-01-01"
+END_DATE = "2023-12-31"
+
+PRICES = pd.read_csv(DATA_FILE_PATH, index_col=0, parse_dates=True)
+
+def counting_downloader(prices):
+    """
+    Wraps frame_downloader and records every (tickers, start, end) request.
+    """
+    download = frame_downloader(prices)
+    calls = []
+
+    def downloader(tickers, start_date, end_date):
+        calls.append((list(tickers), start_date, end_date))
+        return download(tickers, start_date, end_date)
+
+    downloader.calls = calls
+    return downloader
+
+def test_second_update_makes_no_downloads(tmp_path):
+    store_path = str(tmp_path / 'store')
+    tickers = list(PRICES.columns)
+
+    downloader = counting_downloader(PRICES)
+    assert update_data(tickers, START_DATE, END_DATE, store_path, downloader=downloader)
+    assert downloader.calls
+
+    downloader = counting_downloader(PRICES)
+    assert update_data(tickers, START_DATE, END_DATE, store_path, downloader=downloader)
+    assert downloader.calls == []
+
+def test_imported_csv_fetches_trailing_gap_once(tmp_path):
+    store_path = str(tmp_path / 'store')
+    tickers = list(PRICES.columns)
+    import_csv(DATA_FILE_PATH, store_path, start_date=START_DATE, end_date=END_DATE)
+
+    downloader = counting_downloader(PRICES)
+    assert update_data(tickers, START_DATE, END_DATE, store_path, downloader=downloader)
+    assert [(start, end) for _, start, end in downloader.calls] == [("2023-12-30", "2023-12-31")]
+
+    downloader = counting_downloader(PRICES)
+    assert update_data(tickers, START_DATE, END_DATE, store_path, downloader=downloader)
+    assert downloader.calls == []
+
+def test_missing_ticker_is_retried(tmp_path):
+    store_path = str(tmp_path / 'store')
+
+    downloader = counting_downloader(PRICES.drop(columns='MSFT'))
+    assert not update_data(['AAPL', 'MSFT'], START_DATE, "2022-01-01", store_path, downloader=downloader)
+    assert 'MSFT' not in read_store_meta(store_path)['coverage']
+
+    downloader = counting_downloader(PRICES)
+    assert update_data(['AAPL', 'MSFT'], START_DATE, "2022-01-01", store_path, downloader=downloader)
+    assert [tickers for tickers, _, _ in downloader.calls] == [['MSFT']]
+    assert load_prices(store_path)['MSFT'].notna().sum() == PRICES.loc[:"2021-12-31", 'MSFT'].notna().sum()
+
+def test_future_dates_are_not_covered(tmp_path):
+    store_path = str(tmp_path / 'store')
+    today = pd.Timestamp.today().normalize()
+    end_date = (today + pd.Timedelta(days=30)).strftime('%Y-%m-%d')
+
+    update_data(['AAPL'], START_DATE, end_date, store_path, downloader=counting_downloader(PRICES))
+    (covered_start, covered_end), = read_store_meta(store_path)['coverage']['AAPL']
+    assert pd.Timestamp(covered_end) == today
+
+def test_fetch_data_writes_legacy_csv(tmp_path, monkeypatch):
+    csv_path = str(tmp_path / 'prices.csv')
+    monkeypatch.setattr(data_fetcher, 'yfinance_download', frame_downloader(PRICES))
+
+    prices = fetch_data(['AAPL', 'MSFT'], START_DATE, END_DATE, csv_path)
+
+    assert list(prices.columns) == ['AAPL', 'MSFT']
+    pd.testing.assert_frame_equal(load_prices(csv_path), prices, check_freq=False)
@@ -0,0 +1,56 @@
+import os
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.api as sm
+from statsmodels.tsa.stattools import adfuller
+
+from src.pair_finder import find_cointegrated_pairs, find_cointegrated_pairs_batched, screen_pairs
+
+DATA_FILE_PATH = os.path.join(os.path.dirname(__file__), os.pardir, 'data', 'stock_prices.csv')
+
+DATA = pd.read_csv(DATA_FILE_PATH, index_col=0, parse_dates=True).dropna()
+PAIRS = list(combinations(DATA.columns, 2))
+
+def reference_screen(data, pairs, autolag):
+    """
+    The original per-pair OLS + adfuller screen, returning
+    (ticker1, ticker2, p_value, hedge_ratio) for every pair.
+    """
+    results = []
+    for stock1_ticker, stock2_ticker in pairs:
+        stock1_prices = data[stock1_ticker]
+        stock2_prices = data[stock2_ticker]
+        model = sm.OLS(stock2_prices, sm.add_constant(stock1_prices)).fit()
+        hedge_ratio = model.params[stock1_ticker]
+        spread = stock2_prices - hedge_ratio * stock1_prices
+        p_value = adfuller(spread, autolag=autolag)[1]
+        results.append((stock1_ticker, stock2_ticker, p_value, hedge_ratio))
+    return results
+
+@pytest.mark.parametrize('autolag', ['AIC', 'BIC', None])
+def test_screen_pairs_matches_adfuller(autolag):
+    expected = reference_screen(DATA, PAIRS, autolag)
+    result = screen_pairs(DATA, PAIRS, autolag=autolag)
+
+    assert [pair[:2] for pair in result] == [pair[:2] for pair in expected]
+    np.testing.assert_allclose([pair[2] for pair in result], [pair[2] for pair in expected],
+                               rtol=0, atol=1e-9)
+    np.testing.assert_allclose([pair[3] for pair in result], [pair[3] for pair in expected],
+                               rtol=1e-9)
+
+def test_batched_finder_matches_original():
+    expected = find_cointegrated_pairs(DATA, 0.05)
+    result = find_cointegrated_pairs_batched(DATA, 0.05)
+
+    assert [pair[:2] for pair in result] == [pair[:2] for pair in expected]
+    np.testing.assert_allclose([pair[2] for pair in result], [pair[2] for pair in expected],
+                               rtol=0, atol=1e-9)
+
+def test_parallel_screen_keeps_pair_order():
+    serial = screen_pairs(DATA, PAIRS, block_size=8)
+    parallel = screen_pairs(DATA, PAIRS, block_size=8, workers=2)
+
+    assert parallel == serial
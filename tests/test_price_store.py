@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from src import price_store
+from src.price_store import load_prices, save_prices, store_exists
+
+def make_prices(n_days, start="2021-01-04"):
+    index = pd.bdate_range(start, periods=n_days, name='Date').as_unit('ns')
+    values = np.arange(n_days * 2, dtype=float).reshape(n_days, 2) + 1.0
+    return pd.DataFrame(values, index=index, columns=['AAA', 'BBB'])
+
+def test_save_prices_replaces_store(tmp_path):
+    path = str(tmp_path / 'store')
+    save_prices(make_prices(5), path, coverage={'AAA': [['2021-01-04', '2021-01-09']]})
+    updated = make_prices(8)
+    save_prices(updated, path)
+
+    assert_frame_equal(load_prices(path), updated, check_freq=False)
+    assert len([name for name in (tmp_path / 'store').iterdir() if name.suffix == '.npy']) == 2
+
+def test_interrupted_save_keeps_previous_store(tmp_path, monkeypatch):
+    path = str(tmp_path / 'store')
+    original = make_prices(5)
+    save_prices(original, path)
+
+    real_save = np.save
+    calls = []
+
+    def failing_save(file, array):
+        # Let the price matrix through, then fail while writing the dates.
+        calls.append(file)
+        if len(calls) == 2:
+            raise OSError("disk full")
+        return real_save(file, array)
+
+    monkeypatch.setattr(price_store.np, 'save', failing_save)
+
+    with pytest.raises(OSError):
+        save_prices(make_prices(8), path)
+
+    monkeypatch.undo()
+    assert store_exists(path)
+    assert_frame_equal(load_prices(path), original, check_freq=False)
@@ -0,0 +1,32 @@
+from pandas.testing import assert_frame_equal
+
+from src.portfolio import run_portfolio_backtest
+from src.result_cache import ResultCache, cached_run_portfolio_backtest
+from tests.test_backtester import DATA, PAIRS
+
+def counting(function):
+    """
+    Wraps `function` and counts its calls in `wrapper.calls`.
+    """
+    def wrapper(*args, **kwargs):
+        wrapper.calls += 1
+        return function(*args, **kwargs)
+
+    wrapper.calls = 0
+    return wrapper
+
+def test_portfolio_backtest_is_cached(tmp_path):
+    cache = ResultCache(str(tmp_path / 'results.sqlite'))
+    backtest = counting(run_portfolio_backtest)
+    pairs = PAIRS[:5]
+
+    first = cached_run_portfolio_backtest(DATA, pairs, cache, backtest, capital=1000.0)
+    second = cached_run_portfolio_backtest(DATA, pairs, cache, backtest, capital=1000.0)
+    assert backtest.calls == 1
+    assert_frame_equal(second['portfolio'], first['portfolio'])
+    assert_frame_equal(second['position'], first['position'])
+
+    cached_run_portfolio_backtest(DATA, pairs, cache, backtest, capital=1000.0, rebalance=False)
+    cached_run_portfolio_backtest(DATA, pairs[:4], cache, backtest, capital=1000.0)
+    assert backtest.calls == 3
+    cache.close()
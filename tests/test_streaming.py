@@ -0,0 +1,20 @@
+import pytest
+from pandas.testing import assert_series_equal
+
+from src.backtester import run_backtest
+from src.portfolio import pair_label
+from src.streaming import replay_signals
+from tests.test_backtester import DATA, PAIRS
+
+@pytest.mark.parametrize('backtest_kwargs', [
+    {},
+    {'window': 20, 'entry_threshold': 1.5, 'exit_threshold': 0.25, 'stop_loss_threshold': 2.5},
+    {'window': 60},
+], ids=['default', 'window-20', 'window-60'])
+def test_replay_signals_matches_run_backtest(backtest_kwargs):
+    positions = replay_signals(DATA, PAIRS, **backtest_kwargs)['position']
+
+    for pair_info in PAIRS:
+        expected = run_backtest(DATA, pair_info, **backtest_kwargs)['position']
+        assert_series_equal(positions[pair_label(pair_info)], expected,
+                            check_names=False, check_dtype=False)